@@ -0,0 +1,145 @@
+"""Agendamentos concorrentes disputando poucos horarios.
+
+Uso (no diretorio backend, com as migracoes aplicadas):
+
+    python -m benchmarks.booking_contention --writers 32 --attempts 2000
+"""
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from benchmarks.report import percentile
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.config import settings
+from src.controllers import (create_appointment, create_patient,
+                             create_provider)
+from src.schemas import AppointmentCreate, PatientCreate, ProviderCreate
+
+OVERLAPS_SQL = text(
+    """
+    SELECT count(*) FROM appointment a
+    JOIN appointment b ON a.provider_id = b.provider_id AND a.id < b.id
+    WHERE a.provider_id = ANY(:provider_ids)
+      AND a.status NOT IN ('cancelled', 'no_show')
+      AND b.status NOT IN ('cancelled', 'no_show')
+      AND tstzrange(a.date_hour, a.end_hour) && tstzrange(b.date_hour, b.end_hour)
+    """
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=2000)
+    parser.add_argument('--providers', type=int, default=4)
+    parser.add_argument('--slots', type=int, default=50)
+    return parser.parse_args()
+
+
+def person_data(prefix: str) -> dict:
+    return {
+        'name': f'Benchmark {prefix}',
+        'birth_date': '1990-01-01',
+        'gender': 'not_announced',
+        'document': f'{prefix}-{uuid.uuid4().hex[:12]}',
+        'phone_number': '11999999999',
+        'email': 'benchmark@example.com',
+    }
+
+
+def setup(Session, providers: int):
+    with Session() as db:
+        patient = create_patient(
+            db,
+            PatientCreate(**person_data('patient'), insurance_provider='particular'),
+        )
+        provider_ids = [
+            create_provider(
+                db,
+                ProviderCreate(
+                    **person_data('provider'),
+                    specialty='cardiology',
+                    work_shift='full_day',
+                    license_number='BENCH',
+                    active=True,
+                ),
+            ).id
+            for _ in range(providers)
+        ]
+    return patient.id, provider_ids
+
+
+def book(Session, patient_id, provider_ids, start, slots):
+    # horarios de 15 em 15 minutos com consultas de 30: vizinhos se sobrepoem
+    info = AppointmentCreate(
+        patient_id=patient_id,
+        provider_id=random.choice(provider_ids),
+        date_hour=start + timedelta(minutes=15 * random.randrange(slots)),
+        status='scheduled',
+    )
+    begin = time.perf_counter()
+    with Session() as db:
+        try:
+            create_appointment(db, info)
+            outcome = 'booked'
+        except HTTPException as e:
+            outcome = 'conflict' if e.status_code == 409 else 'error'
+    return outcome, time.perf_counter() - begin
+
+
+def main():
+    args = parse_args()
+    engine = create_engine(
+        settings.DATABASE_URL, pool_size=args.writers, max_overflow=0
+    )
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    patient_id, provider_ids = setup(Session, args.providers)
+    # profissionais novos a cada execucao: os horarios nao colidem com a
+    # agenda existente. Dentro das particoes ja criadas, as 8h da clinica
+    today = datetime.now(ZoneInfo(settings.CLINIC_TIMEZONE)).date()
+    start = datetime.combine(
+        today + timedelta(days=random.randrange(1, 180)),
+        datetime.min.time(),
+        ZoneInfo(settings.CLINIC_TIMEZONE),
+    ) + timedelta(hours=8)
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as executor:
+        results = list(
+            executor.map(
+                lambda _: book(
+                    Session, patient_id, provider_ids, start, args.slots
+                ),
+                range(args.attempts),
+            )
+        )
+    elapsed = time.perf_counter() - begin
+
+    outcomes = [outcome for outcome, _ in results]
+    latencies = [latency for _, latency in results]
+    with engine.connect() as connection:
+        overlaps = connection.execute(
+            OVERLAPS_SQL, {'provider_ids': provider_ids}
+        ).scalar_one()
+
+    print(f'writers:     {args.writers}')
+    print(f'attempts:    {args.attempts} in {elapsed:.2f}s '
+          f'({args.attempts / elapsed:.0f} req/s)')
+    print(f'booked:      {outcomes.count("booked")}')
+    print(f'conflicts:   {outcomes.count("conflict")}')
+    print(f'errors:      {outcomes.count("error")}')
+    print(f'latency ms:  p50={percentile(latencies, 50):.1f} '
+          f'p95={percentile(latencies, 95):.1f} '
+          f'p99={percentile(latencies, 99):.1f}')
+    print(f'overlaps:    {overlaps}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""Carga HTTP com concorrencia controlada contra a API em execucao.
+
+Uso (API rodando e massa criada por benchmarks.seed):
+
+    python -m benchmarks.load --concurrency 32 --duration 60 \\
+        --output atual.json --compare baseline.json
+
+Cada worker repete, pelo tempo pedido, cenarios sorteados pelos pesos de
+--mix (ex.: --mix list_patients=5,book_appointment=2). Latencias do
+aquecimento (--warmup) sao descartadas. Com --compare, sai com status 1
+quando algum cenario piora alem de --tolerance.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.report import compare, load, print_table, summarize
+from src.constants import APPOINTMENT_DURATION_MINUTES
+from src.schemas import AppointmentStatus, InsuranceProvider
+
+DEFAULT_MIX = {
+    'login': 1,
+    'create_patient': 2,
+    'list_patients': 5,
+    'get_patient': 5,
+    'update_patient': 2,
+    'list_appointments': 4,
+    'book_appointment': 2,
+}
+
+
+def parse_mix(raw: str) -> dict:
+    mix = {}
+    for item in raw.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f'Unknown scenario: {name}')
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--username', default='benchmark')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    return parser.parse_args()
+
+
+class Client:
+    # uma conexao keep-alive por worker
+    def __init__(self, base_url: str, token: str | None = None):
+        url = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection
+            if url.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(url.netloc, timeout=30)
+        self.token = token
+
+    def request(self, method: str, path: str, body=None, form=None):
+        headers = {}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return None, None
+        return response.status, data
+
+    def json(self, method: str, path: str, **kwargs):
+        status, data = self.request(method, path, **kwargs)
+        if status != 200:
+            raise SystemExit(f'{method} {path} failed with status {status}')
+        return json.loads(data)
+
+
+class Context:
+    def __init__(self, args, client: Client):
+        self.args = args
+        self.max_patient = self.max_id(client, '/patients/')
+        self.max_provider = self.max_id(client, '/providers/')
+        if not self.max_patient or not self.max_provider:
+            raise SystemExit('Seed the database first (benchmarks.seed)')
+
+    @staticmethod
+    def max_id(client: Client, path: str) -> int:
+        page = client.json('GET', f'{path}?sort=-id&limit=1')
+        return page['items'][0]['id'] if page['items'] else 0
+
+
+def person_payload(rng) -> dict:
+    return {
+        'name': f'Load {rng.randrange(10**6)}',
+        'birth_date': '1990-01-01',
+        'gender': 'not_announced',
+        'document': f'load-{uuid.uuid4().hex}',
+        'phone_number': '11999999999',
+        'email': 'load@example.com',
+    }
+
+
+def login(client, context, rng):
+    return client.request(
+        'POST',
+        '/login/',
+        form={
+            'username': context.args.username,
+            'password': context.args.password,
+        },
+    )
+
+
+def create_patient(client, context, rng):
+    return client.request(
+        'POST',
+        '/patients/',
+        body={
+            **person_payload(rng),
+            'insurance_provider': rng.choice(list(InsuranceProvider)).value,
+        },
+    )
+
+
+def list_patients(client, context, rng):
+    insurance = rng.choice(list(InsuranceProvider)).value
+    return client.request(
+        'GET',
+        f'/patients/?limit=50&insurance_provider={insurance}&expand=person',
+    )
+
+
+def get_patient(client, context, rng):
+    patient_id = rng.randint(1, context.max_patient)
+    return client.request('GET', f'/patients/{patient_id}?expand=person')
+
+
+def update_patient(client, context, rng):
+    patient_id = rng.randint(1, context.max_patient)
+    return client.request(
+        'PUT',
+        f'/patients/{patient_id}',
+        body={'blood_type': rng.choice(('A+', 'B+', 'O+', 'O-'))},
+    )
+
+
+def list_appointments(client, context, rng):
+    provider_id = rng.randint(1, context.max_provider)
+    return client.request(
+        'GET', f'/appointments/?provider_id={provider_id}&limit=50'
+    )
+
+
+def book_appointment(client, context, rng):
+    # horario futuro aleatorio; conflitos (409) sao parte da carga
+    slot = rng.randrange(365 * 24 * 60 // APPOINTMENT_DURATION_MINUTES)
+    date_hour = datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=1, minutes=slot * APPOINTMENT_DURATION_MINUTES)
+    return client.request(
+        'POST',
+        '/appointments/',
+        body={
+            'patient_id': rng.randint(1, context.max_patient),
+            'provider_id': rng.randint(1, context.max_provider),
+            'date_hour': date_hour.isoformat(),
+            'status': AppointmentStatus.scheduled.value,
+        },
+    )
+
+
+SCENARIOS = {
+    'login': login,
+    'create_patient': create_patient,
+    'list_patients': list_patients,
+    'get_patient': get_patient,
+    'update_patient': update_patient,
+    'list_appointments': list_appointments,
+    'book_appointment': book_appointment,
+}
+
+
+def worker(args, token, context, seed, measure_from, stop_at, results, lock):
+    rng = random.Random(seed)
+    client = Client(args.base_url, token)
+    names = list(args.mix)
+    weights = list(args.mix.values())
+    samples = defaultdict(list)
+    while True:
+        name = rng.choices(names, weights)[0]
+        begin = time.perf_counter()
+        if begin >= stop_at:
+            break
+        status, _ = SCENARIOS[name](client, context, rng)
+        if begin >= measure_from:
+            samples[name].append((time.perf_counter() - begin, status))
+    with lock:
+        for name, values in samples.items():
+            results[name].extend(values)
+
+
+def main():
+    args = parse_args()
+    client = Client(args.base_url)
+    token = client.json(
+        'POST',
+        '/login/',
+        form={'username': args.username, 'password': args.password},
+    )['access_token']
+    client.token = token
+    context = Context(args, client)
+
+    results = defaultdict(list)
+    lock = threading.Lock()
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(
+                worker, args, token, context, args.seed + index,
+                measure_from, stop_at, results, lock,
+            )
+            for index in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+
+    scenarios = {
+        name: summarize(
+            [latency for latency, _ in values],
+            [status for _, status in values],
+            args.duration,
+        )
+        for name, values in sorted(results.items())
+    }
+    run = {
+        'meta': {
+            'base_url': args.base_url,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'mix': args.mix,
+            'started_at': started_at.isoformat(),
+        },
+        'scenarios': scenarios,
+    }
+    print_table(scenarios)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(run, file, indent=2)
+    if args.compare:
+        regressions = compare(load(args.compare), run, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Percentis, resumo e comparacao de execucoes dos benchmarks.
+
+Uso (compara duas execucoes salvas por benchmarks.load --output):
+
+    python -m benchmarks.report baseline.json atual.json --tolerance 0.1
+
+Sai com status 1 quando algum cenario piora alem da tolerancia.
+"""
+import argparse
+import json
+import statistics
+import sys
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return (values[0] if values else 0.0) * 1000
+    quantiles = statistics.quantiles(values, n=100, method='inclusive')
+    return quantiles[pct - 1] * 1000
+
+
+def summarize(latencies, statuses, elapsed: float) -> dict:
+    # latencias em segundos; erros sao falhas de conexao e respostas 5xx,
+    # 4xx esperados (404, 409) ficam so na contagem por status
+    summary = {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'errors': sum(1 for status in statuses if status is None or status >= 500),
+        'statuses': {},
+        'max_ms': max(latencies, default=0.0) * 1000,
+    }
+    for status in statuses:
+        key = str(status or 'error')
+        summary['statuses'][key] = summary['statuses'].get(key, 0) + 1
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = percentile(latencies, pct)
+    return summary
+
+
+def print_table(results: dict):
+    print(
+        f'{"scenario":<20}{"requests":>10}{"req/s":>10}{"errors":>8}'
+        + ''.join(f'{f"p{pct}":>9}' for pct in PERCENTILES)
+        + f'{"max":>9}'
+    )
+    for name, summary in results.items():
+        print(
+            f'{name:<20}{summary["requests"]:>10}'
+            f'{summary["throughput"]:>10.1f}{summary["errors"]:>8}'
+            + ''.join(
+                f'{summary[f"p{pct}_ms"]:>9.1f}' for pct in PERCENTILES
+            )
+            + f'{summary["max_ms"]:>9.1f}'
+        )
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    # regressao: p95 maior ou vazao menor que a base alem da tolerancia
+    regressions = []
+    for key in ('concurrency', 'duration', 'mix'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f'warning: runs differ in {key}')
+    for name, before in baseline['scenarios'].items():
+        after = current['scenarios'].get(name)
+        if after is None or not before['requests']:
+            continue
+        p95 = after['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0
+        rps = (
+            after['throughput'] / before['throughput'] - 1
+            if before['throughput']
+            else 0
+        )
+        print(f'{name:<20} p95 {p95:+7.1%}  req/s {rps:+7.1%}')
+        if p95 > tolerance:
+            regressions.append(
+                f'{name}: p95 {before["p95_ms"]:.1f}ms -> {after["p95_ms"]:.1f}ms'
+            )
+        if rps < -tolerance:
+            regressions.append(
+                f'{name}: req/s {before["throughput"]:.1f} -> '
+                f'{after["throughput"]:.1f}'
+            )
+        if after['errors'] > before['errors']:
+            regressions.append(
+                f'{name}: errors {before["errors"]} -> {after["errors"]}'
+            )
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.report')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    regressions = compare(load(args.baseline), load(args.current), args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""Carga de uma massa sintetica grande via COPY.
+
+Uso (no diretorio backend, com as migracoes aplicadas):
+
+    python -m benchmarks.seed --scale 1
+    python -m benchmarks.seed --scale 0.01 --seed 7
+
+Com --scale 1 sao 1M pessoas, 200k pacientes, 2k profissionais e 5M
+consultas em todos os status, convenios e especialidades. Os ids continuam
+a partir dos existentes, entao a carga pode ser repetida no mesmo banco.
+Os indices secundarios sao removidos antes do COPY e recriados no fim
+(--keep-indexes desliga), tudo numa transacao so. Cria tambem o usuario
+usado por benchmarks.load.
+"""
+import argparse
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.config import settings
+from src.constants import APPOINTMENT_DURATION_MINUTES
+from src.controllers import create_user
+from src.controllers.crud_users import get_user
+from src.partitions import ensure_partitions
+from src.schemas import (AppointmentStatus, Gender, InsuranceProvider,
+                         ProviderSpeciality, UserCreate, WorkShift)
+from src.stats import rebuild_stats
+from src.versions import bump_versions
+
+CHUNK_SIZE = 100_000
+FIRST_NAMES = (
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela',
+    'Heitor', 'Isabela', 'Joao', 'Larissa', 'Marcos', 'Natalia', 'Otavio',
+    'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vitoria', 'Yuri',
+)
+LAST_NAMES = (
+    'Almeida', 'Barbosa', 'Cardoso', 'Dias', 'Ferreira', 'Gomes', 'Lima',
+    'Martins', 'Nunes', 'Oliveira', 'Pereira', 'Ribeiro', 'Santos', 'Silva',
+    'Souza', 'Teixeira',
+)
+BLOOD_TYPES = ('A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-', r'\N')
+# status por periodo: consultas passadas terminaram, futuras estao marcadas
+PAST_STATUSES = {
+    AppointmentStatus.completed: 80,
+    AppointmentStatus.cancelled: 12,
+    AppointmentStatus.no_show: 8,
+}
+FUTURE_STATUSES = {
+    AppointmentStatus.scheduled: 60,
+    AppointmentStatus.confirmed: 30,
+    AppointmentStatus.cancelled: 10,
+}
+# expediente de 8h as 18h, horarios de APPOINTMENT_DURATION_MINUTES
+DAY_START_HOUR = 8
+SLOTS_PER_DAY = 10 * 60 // APPOINTMENT_DURATION_MINUTES
+
+PERSON_COLUMNS = (
+    'id', 'name', 'birth_date', 'document', 'gender', 'phone_number',
+    'email', 'created_at',
+)
+PATIENT_COLUMNS = (
+    'id', 'person_id', 'medical_record_number', 'insurance_provider',
+    'insurance_number', 'blood_type', 'organ_donor', 'created_at',
+)
+PROVIDER_COLUMNS = (
+    'id', 'person_id', 'specialty', 'work_shift', 'license_number', 'active',
+    'created_at',
+)
+APPOINTMENT_COLUMNS = (
+    'id', 'patient_id', 'provider_id', 'date_hour', 'end_hour', 'status',
+    'created_at',
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.seed')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--username', default='benchmark')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--keep-indexes', action='store_true')
+    return parser.parse_args()
+
+
+def counts(scale: float) -> dict:
+    return {
+        'person': max(int(1_000_000 * scale), 3),
+        'patient': max(int(200_000 * scale), 1),
+        'provider': max(int(2_000 * scale), 1),
+        'appointment': int(5_000_000 * scale),
+    }
+
+
+def next_ids(connection) -> dict:
+    return {
+        table: connection.execute(
+            text(f'SELECT coalesce(max(id), 0) FROM {table}')
+        ).scalar_one()
+        for table in ('person', 'patient', 'provider', 'appointment')
+    }
+
+
+def drop_indexes(cursor, table: str) -> list[str]:
+    # a exclusao (sem sobreposicao, uma por particao) e recriada em lote via
+    # ALTER TABLE, que valida tudo de uma vez; pk e unique ficam e validam a
+    # carga linha a linha
+    cursor.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'x' AND (
+          conrelid = %s::regclass OR conrelid IN (
+            SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass
+          )
+        )
+        """,
+        (table, table),
+    )
+    definitions = []
+    for relation, name, definition in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {relation} DROP CONSTRAINT {name}')
+        definitions.append(
+            f'ALTER TABLE {relation} ADD CONSTRAINT {name} {definition}'
+        )
+    cursor.execute(
+        """
+        SELECT i.indexname, i.indexdef FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = %s
+          AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint c
+            WHERE c.conindid = (quote_ident(i.indexname))::regclass
+          )
+        """,
+        (table,),
+    )
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {name}')
+    return definitions + [definition for _, definition in indexes]
+
+
+def create_indexes(cursor, definitions: list[str]):
+    for definition in definitions:
+        cursor.execute(definition)
+
+
+def copy_rows(cursor, table: str, columns, rows):
+    # COPY em blocos para manter a memoria constante
+    sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+    buffer = io.StringIO()
+    size = 0
+    for row in rows:
+        buffer.write('\t'.join(map(str, row)))
+        buffer.write('\n')
+        size += 1
+        if size == CHUNK_SIZE:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer = io.StringIO()
+            size = 0
+    if size:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+
+def person_rows(rng, first_id: int, total: int, now: datetime):
+    genders = [gender.value for gender in Gender]
+    for person_id in range(first_id, first_id + total):
+        birth_date = date(1940, 1, 1) + timedelta(days=rng.randrange(30000))
+        yield (
+            person_id,
+            f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} '
+            f'{rng.choice(LAST_NAMES)}',
+            birth_date,
+            f'{person_id:011d}',
+            rng.choice(genders),
+            f'11{rng.randrange(900000000, 999999999)}',
+            f'pessoa{person_id}@example.com',
+            now,
+        )
+
+
+def patient_rows(rng, first_id: int, first_person: int, total: int, now):
+    insurances = [insurance.value for insurance in InsuranceProvider]
+    for offset in range(total):
+        insurance = rng.choice(insurances)
+        yield (
+            first_id + offset,
+            first_person + offset,
+            uuid.UUID(int=rng.getrandbits(128), version=4),
+            insurance,
+            r'\N' if insurance == 'particular' else rng.randrange(10**9, 10**10),
+            rng.choice(BLOOD_TYPES),
+            't' if rng.random() < 0.3 else 'f',
+            now,
+        )
+
+
+def provider_rows(rng, first_id: int, first_person: int, total: int, now):
+    specialties = [specialty.value for specialty in ProviderSpeciality]
+    shifts = [shift.value for shift in WorkShift]
+    for offset in range(total):
+        yield (
+            first_id + offset,
+            first_person + offset,
+            rng.choice(specialties),
+            rng.choice(shifts),
+            f'CRM-{first_id + offset:06d}',
+            't' if rng.random() < 0.95 else 'f',
+            now,
+        )
+
+
+def schedule_days(total: int, providers: int, now: datetime):
+    # a agenda e centrada em hoje, metade no passado e metade no futuro
+    per_provider = -(-total // providers)
+    days = -(-per_provider // SLOTS_PER_DAY)
+    first_day = datetime.combine(
+        now.date() - timedelta(days=days // 2),
+        datetime.min.time(),
+        tzinfo=timezone.utc,
+    )
+    return first_day, days
+
+
+def appointment_rows(
+    rng, first_id, patient_ids, provider_ids, total: int, now: datetime
+):
+    # cada profissional recebe horarios consecutivos, sem sobreposicao
+    first_day, _ = schedule_days(total, len(provider_ids), now)
+    duration = timedelta(minutes=APPOINTMENT_DURATION_MINUTES)
+    past = list(PAST_STATUSES), list(PAST_STATUSES.values())
+    future = list(FUTURE_STATUSES), list(FUTURE_STATUSES.values())
+    for offset in range(total):
+        slot, provider = divmod(offset, len(provider_ids))
+        day, slot = divmod(slot, SLOTS_PER_DAY)
+        date_hour = first_day + timedelta(
+            days=day, hours=DAY_START_HOUR
+        ) + slot * duration
+        statuses, weights = past if date_hour < now else future
+        yield (
+            first_id + offset,
+            rng.choice(patient_ids),
+            provider_ids[provider],
+            date_hour.isoformat(),
+            (date_hour + duration).isoformat(),
+            rng.choices(statuses, weights)[0].value,
+            now,
+        )
+
+
+def timed(label: str, function, *args):
+    begin = time.perf_counter()
+    result = function(*args)
+    print(f'{label:<28}{time.perf_counter() - begin:>8.1f}s')
+    return result
+
+
+def main():
+    args = parse_args()
+    total = counts(args.scale)
+    if total['patient'] + total['provider'] > total['person']:
+        raise SystemExit('--scale too small for patients and providers')
+    engine = create_engine(settings.DATABASE_URL)
+    now = datetime.now(timezone.utc)
+
+    with engine.connect() as connection:
+        last = next_ids(connection)
+    # a semente inclui o ponto de partida: cargas repetidas nao geram os
+    # mesmos prontuarios (unique), e a mesma base gera a mesma massa
+    rng = random.Random(f'{args.seed}-{last["person"]}')
+    first_patient_person = last['person'] + 1
+    first_provider_person = first_patient_person + total['patient']
+    patient_ids = range(last['patient'] + 1, last['patient'] + 1 + total['patient'])
+    provider_ids = range(
+        last['provider'] + 1, last['provider'] + 1 + total['provider']
+    )
+
+    # particoes mensais (src.partitions) para todo o periodo da agenda
+    first_day, days = schedule_days(total['appointment'], total['provider'], now)
+    with engine.begin() as connection:
+        ensure_partitions(
+            connection, first_day.date(), (first_day + timedelta(days=days)).date()
+        )
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        indexes = []
+        if not args.keep_indexes:
+            cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+            for table in ('person', 'patient', 'provider', 'appointment'):
+                indexes += drop_indexes(cursor, table)
+        timed(
+            f'person ({total["person"]})', copy_rows, cursor, 'person',
+            PERSON_COLUMNS,
+            person_rows(rng, last['person'] + 1, total['person'], now),
+        )
+        timed(
+            f'patient ({total["patient"]})', copy_rows, cursor, 'patient',
+            PATIENT_COLUMNS,
+            patient_rows(
+                rng, patient_ids.start, first_patient_person,
+                total['patient'], now,
+            ),
+        )
+        timed(
+            f'provider ({total["provider"]})', copy_rows, cursor, 'provider',
+            PROVIDER_COLUMNS,
+            provider_rows(
+                rng, provider_ids.start, first_provider_person,
+                total['provider'], now,
+            ),
+        )
+        timed(
+            f'appointment ({total["appointment"]})', copy_rows, cursor,
+            'appointment', APPOINTMENT_COLUMNS,
+            appointment_rows(
+                rng, last['appointment'] + 1, patient_ids, provider_ids,
+                total['appointment'], now,
+            ),
+        )
+        timed(f'indexes ({len(indexes)})', create_indexes, cursor, indexes)
+        # ids explicitos nao avancam as sequences
+        for table in ('person', 'patient', 'provider', 'appointment'):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f'(SELECT max(id) FROM {table}))'
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        timed('appointment_daily_stats', rebuild_stats, db)
+        bump_versions(db, 'person', 'patient', 'provider', 'appointment')
+        db.commit()
+        if not get_user(db, username=args.username):
+            create_user(
+                db,
+                UserCreate(
+                    username=args.username,
+                    email=f'{args.username}@example.com',
+                    password=args.password,
+                    admin=True,
+                ),
+            )
+
+    with engine.connect().execution_options(
+        isolation_level='AUTOCOMMIT'
+    ) as connection:
+        timed('analyze', connection.execute, text('ANALYZE'))
+
+
+if __name__ == '__main__':
+    main()
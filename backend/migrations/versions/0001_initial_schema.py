@@ -0,0 +1,102 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # bancos criados pelo antigo create_all ja tem essas tabelas
+    if sa.inspect(op.get_bind()).has_table('person'):
+        return
+
+    op.create_table(
+        'person',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('birth_date', sa.Date(), nullable=False),
+        sa.Column('document', sa.String()),
+        sa.Column('gender', sa.String()),
+        sa.Column('phone_number', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        'patient',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'person_id',
+            sa.Integer(),
+            sa.ForeignKey('person.id'),
+            nullable=False,
+        ),
+        sa.Column(
+            'medical_record_number',
+            postgresql.UUID(as_uuid=True),
+            unique=True,
+            nullable=False,
+        ),
+        sa.Column('insurance_provider', sa.String(), nullable=True),
+        sa.Column('insurance_number', sa.String(), nullable=True),
+        sa.Column('blood_type', sa.String(), nullable=True),
+        sa.Column('organ_donor', sa.Boolean(), nullable=False),
+        sa.Column('emergency_contact', sa.String(), nullable=True),
+        sa.Column('emergency_phone', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        'provider',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('person_id', sa.Integer(), sa.ForeignKey('person.id')),
+        sa.Column('specialty', sa.String(), nullable=False),
+        sa.Column('work_shift', sa.String(), nullable=False),
+        sa.Column('license_number', sa.String(), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('availability_notes', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        'appointment',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('patient_id', sa.Integer(), sa.ForeignKey('patient.id')),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('provider.id')),
+        sa.Column('date_hour', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=True),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String()),
+        sa.Column('email', sa.String()),
+        sa.Column('hashed_password', sa.String()),
+        sa.Column('admin', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_active', sa.Boolean()),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+
+def downgrade():
+    op.drop_table('users')
+    op.drop_table('appointment')
+    op.drop_table('provider')
+    op.drop_table('patient')
+    op.drop_table('person')
@@ -0,0 +1,84 @@
+"""hot path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+ACTIVE_STATUSES = "status IN ('scheduled', 'confirmed', 'in_progress')"
+
+INDEXES = [
+    ('ix_person_document', 'person', ['document'], None),
+    ('ix_patient_person_id', 'patient', ['person_id'], None),
+    (
+        'ix_patient_person_id_not_deleted',
+        'patient',
+        ['person_id'],
+        'deleted_at IS NULL',
+    ),
+    ('ix_provider_person_id', 'provider', ['person_id'], None),
+    (
+        'ix_provider_specialty_not_deleted',
+        'provider',
+        ['specialty'],
+        'deleted_at IS NULL AND active',
+    ),
+    (
+        'ix_appointment_provider_id_date_hour',
+        'appointment',
+        ['provider_id', 'date_hour'],
+        None,
+    ),
+    (
+        'ix_appointment_patient_id_status',
+        'appointment',
+        ['patient_id', 'status'],
+        None,
+    ),
+    (
+        'ix_appointment_provider_id_active',
+        'appointment',
+        ['provider_id'],
+        ACTIVE_STATUSES,
+    ),
+    (
+        'ix_appointment_status_date_hour',
+        'appointment',
+        ['status', 'date_hour'],
+        None,
+    ),
+    ('ix_appointment_date_hour_id', 'appointment', ['date_hour', 'id'], None),
+]
+
+
+def upgrade():
+    # CONCURRENTLY nao roda dentro de transacao, mas evita travar escritas
+    # nas tabelas grandes enquanto os indices sao criados
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
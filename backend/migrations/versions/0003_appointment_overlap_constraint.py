@@ -0,0 +1,44 @@
+"""appointment overlap constraint
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:20:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+APPOINTMENT_DURATION_MINUTES = 30
+
+
+def upgrade():
+    op.add_column(
+        'appointment',
+        sa.Column('end_hour', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        'UPDATE appointment SET end_hour = date_hour + '
+        f"interval '{APPOINTMENT_DURATION_MINUTES} minutes'"
+    )
+    op.alter_column('appointment', 'end_hour', nullable=False)
+
+    # a restricao falha se ja existirem atendimentos sobrepostos; eles
+    # precisam ser remarcados ou cancelados antes desta migracao
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        'ALTER TABLE appointment ADD CONSTRAINT appointment_provider_no_overlap '
+        'EXCLUDE USING gist '
+        '(provider_id WITH =, tstzrange(date_hour, end_hour) WITH &&) '
+        "WHERE (status NOT IN ('cancelled', 'no_show'))"
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        'appointment_provider_no_overlap', 'appointment', type_='exclude'
+    )
+    op.drop_column('appointment', 'end_hour')
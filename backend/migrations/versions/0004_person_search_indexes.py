@@ -0,0 +1,51 @@
+"""person search indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:40:00
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# (nome, coluna, operator class, metodo)
+INDEXES = [
+    ('ix_person_name_trgm', 'name', 'gin_trgm_ops', 'gin'),
+    ('ix_person_email_trgm', 'email', 'gin_trgm_ops', 'gin'),
+    ('ix_person_document_prefix', 'document', 'text_pattern_ops', 'btree'),
+    (
+        'ix_person_phone_number_prefix',
+        'phone_number',
+        'text_pattern_ops',
+        'btree',
+    ),
+]
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, column, ops, using in INDEXES:
+            op.create_index(
+                name,
+                'person',
+                [column],
+                postgresql_using=using,
+                postgresql_ops={column: ops},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _column, _ops, _using in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='person',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,32 @@
+"""change versions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLES = ['person', 'patient', 'provider', 'appointment']
+
+
+def upgrade():
+    op.create_table(
+        'change_version',
+        sa.Column('table_name', sa.String(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.execute(
+        'INSERT INTO change_version (table_name, version, updated_at) VALUES '
+        + ', '.join(f"('{name}', 0, now())" for name in TABLES)
+    )
+
+
+def downgrade():
+    op.drop_table('change_version')
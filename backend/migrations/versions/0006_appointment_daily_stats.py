@@ -0,0 +1,42 @@
+"""appointment daily stats
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:40:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from src.config import settings
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'appointment_daily_stats',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column(
+            'provider_id',
+            sa.Integer(),
+            sa.ForeignKey('provider.id'),
+            primary_key=True,
+        ),
+        sa.Column('status', sa.String(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+    )
+    op.execute(
+        sa.text(
+            'INSERT INTO appointment_daily_stats '
+            '(day, provider_id, status, count) '
+            'SELECT (date_hour AT TIME ZONE :tz)::date, provider_id, status, '
+            'count(*) FROM appointment WHERE provider_id IS NOT NULL '
+            'GROUP BY 1, 2, 3'
+        ).bindparams(tz=settings.CLINIC_TIMEZONE)
+    )
+
+
+def downgrade():
+    op.drop_table('appointment_daily_stats')
@@ -0,0 +1,50 @@
+"""scheduler jobs and reminder outbox
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:20:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduled_job',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_status', sa.String(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('last_processed', sa.Integer(), nullable=False),
+        sa.Column('last_duration_seconds', sa.Float(), nullable=True),
+        sa.Column('runs', sa.BigInteger(), nullable=False),
+        sa.Column('node', sa.String(), nullable=True),
+    )
+    op.create_table(
+        'appointment_reminder',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('appointment_id', sa.Integer(), nullable=False, unique=True),
+        sa.Column('remind_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'ix_appointment_reminder_pending',
+        'appointment_reminder',
+        ['remind_at'],
+        postgresql_where=sa.text('sent_at IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_appointment_reminder_pending', table_name='appointment_reminder'
+    )
+    op.drop_table('appointment_reminder')
+    op.drop_table('scheduled_job')
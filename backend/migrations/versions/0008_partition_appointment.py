@@ -0,0 +1,141 @@
+"""monthly partitions for appointment
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 19:40:00
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+from src.config import settings
+from src.constants import PARTITION_MONTHS_AHEAD
+from src.partitions import add_months, create_partition
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    'id, patient_id, provider_id, date_hour, end_hour, status, reason, '
+    'notes, created_at'
+)
+ACTIVE_STATUSES = "status IN ('scheduled', 'confirmed', 'in_progress')"
+INDEXES = [
+    ('ix_appointment_provider_id_date_hour', ['provider_id', 'date_hour'], None),
+    ('ix_appointment_patient_id_status', ['patient_id', 'status'], None),
+    ('ix_appointment_provider_id_active', ['provider_id'], ACTIVE_STATUSES),
+    ('ix_appointment_status_date_hour', ['status', 'date_hour'], None),
+    ('ix_appointment_date_hour_id', ['date_hour', 'id'], None),
+]
+
+
+def create_indexes():
+    # na tabela particionada o indice vale para todas as particoes, inclusive
+    # as criadas depois
+    for name, columns, where in INDEXES:
+        op.create_index(
+            name,
+            'appointment',
+            columns,
+            postgresql_where=sa.text(where) if where else None,
+        )
+
+
+def upgrade():
+    # a tabela e reescrita com ACCESS EXCLUSIVE ate o fim da migracao: rodar
+    # com a API parada. Falha se alguma consulta atravessar a virada do mes
+    # (CHECK das particoes); ela precisa ser remarcada antes
+    op.execute('ALTER SEQUENCE appointment_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE appointment RENAME TO appointment_unpartitioned')
+    op.execute(
+        'ALTER TABLE appointment_unpartitioned '
+        'RENAME CONSTRAINT appointment_pkey TO appointment_unpartitioned_pkey'
+    )
+    op.execute(
+        """
+        CREATE TABLE appointment (
+            id integer NOT NULL DEFAULT nextval('appointment_id_seq'),
+            patient_id integer REFERENCES patient (id),
+            provider_id integer REFERENCES provider (id),
+            date_hour timestamptz NOT NULL,
+            end_hour timestamptz NOT NULL,
+            status varchar NOT NULL,
+            reason varchar,
+            notes varchar,
+            created_at timestamptz NOT NULL,
+            PRIMARY KEY (id, date_hour)
+        ) PARTITION BY RANGE (date_hour)
+        """
+    )
+
+    # meses contiguos do primeiro atendimento ate PARTITION_MONTHS_AHEAD a
+    # frente; meses isolados fora disso ganham so a propria particao
+    bind = op.get_bind()
+    months = set(
+        bind.execute(
+            sa.text(
+                'SELECT DISTINCT '
+                "CAST(date_trunc('month', date_hour AT TIME ZONE :zone) AS date) "
+                'FROM appointment_unpartitioned'
+            ),
+            {'zone': settings.CLINIC_TIMEZONE},
+        ).scalars()
+    )
+    today = datetime.now(ZoneInfo(settings.CLINIC_TIMEZONE)).date()
+    month = min(months | {today.replace(day=1)})
+    last = add_months(today, PARTITION_MONTHS_AHEAD)
+    while month <= last:
+        months.add(month)
+        month = add_months(month, 1)
+    for month in sorted(months):
+        create_partition(bind, month)
+
+    op.execute(
+        f'INSERT INTO appointment ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM appointment_unpartitioned'
+    )
+    op.execute('DROP TABLE appointment_unpartitioned')
+    create_indexes()
+    op.execute('ALTER SEQUENCE appointment_id_seq OWNED BY appointment.id')
+    op.execute('ANALYZE appointment')
+
+
+def downgrade():
+    # particoes ja destacadas ou arquivadas pela retencao nao voltam
+    op.execute('ALTER SEQUENCE appointment_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE appointment RENAME TO appointment_partitioned')
+    op.execute(
+        'ALTER TABLE appointment_partitioned '
+        'RENAME CONSTRAINT appointment_pkey TO appointment_partitioned_pkey'
+    )
+    op.execute(
+        """
+        CREATE TABLE appointment (
+            id integer PRIMARY KEY DEFAULT nextval('appointment_id_seq'),
+            patient_id integer REFERENCES patient (id),
+            provider_id integer REFERENCES provider (id),
+            date_hour timestamptz NOT NULL,
+            end_hour timestamptz NOT NULL,
+            status varchar NOT NULL,
+            reason varchar,
+            notes varchar,
+            created_at timestamptz NOT NULL
+        )
+        """
+    )
+    op.execute(
+        f'INSERT INTO appointment ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM appointment_partitioned'
+    )
+    op.execute('DROP TABLE appointment_partitioned')
+    create_indexes()
+    op.execute(
+        'ALTER TABLE appointment ADD CONSTRAINT appointment_provider_no_overlap '
+        'EXCLUDE USING gist '
+        '(provider_id WITH =, tstzrange(date_hour, end_hour) WITH &&) '
+        "WHERE (status NOT IN ('cancelled', 'no_show'))"
+    )
+    op.execute('ALTER SEQUENCE appointment_id_seq OWNED BY appointment.id')
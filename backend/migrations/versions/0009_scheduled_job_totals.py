@@ -0,0 +1,46 @@
+"""cumulative scheduler job totals
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 21:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # os jobs rodam no servico scheduler; o /metrics da API le os totais daqui
+    op.add_column(
+        'scheduled_job',
+        sa.Column(
+            'failures', sa.BigInteger(), nullable=False, server_default='0'
+        ),
+    )
+    op.add_column(
+        'scheduled_job',
+        sa.Column(
+            'processed', sa.BigInteger(), nullable=False, server_default='0'
+        ),
+    )
+    op.add_column(
+        'scheduled_job',
+        sa.Column('last_success_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    # das execucoes anteriores so a ultima e conhecida
+    op.execute(
+        'UPDATE scheduled_job SET processed = last_processed, '
+        "failures = CASE WHEN last_status = 'error' THEN 1 ELSE 0 END, "
+        'last_success_at = CASE '
+        "WHEN last_status = 'success' THEN last_finished_at END"
+    )
+
+
+def downgrade():
+    op.drop_column('scheduled_job', 'last_success_at')
+    op.drop_column('scheduled_job', 'processed')
+    op.drop_column('scheduled_job', 'failures')
@@ -0,0 +1,63 @@
+from datetime import date, datetime, time, timedelta, tzinfo
+
+from src.constants import SLOT_MINUTES, WORK_SHIFT_HOURS
+
+# cada dia de cada profissional vira um inteiro onde o bit i representa
+# o intervalo [i * SLOT_MINUTES, (i + 1) * SLOT_MINUTES) do dia
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def bit_range(first: int, last: int) -> int:
+    return ((1 << (last - first)) - 1) << first
+
+
+def shift_mask(work_shift: str) -> int:
+    start_hour, end_hour = WORK_SHIFT_HOURS[work_shift]
+    return bit_range(
+        start_hour * 60 // SLOT_MINUTES, end_hour * 60 // SLOT_MINUTES
+    )
+
+
+def mark_busy(
+    bitmaps: dict, key, start: datetime, end: datetime, tz: tzinfo
+):
+    # marca em bitmaps[(key, dia)] os slots ocupados entre start e end
+    start, end = start.astimezone(tz), end.astimezone(tz)
+    day = start.date()
+    first = (start.hour * 60 + start.minute) // SLOT_MINUTES
+    while True:
+        day_start = datetime.combine(day, time(), tz)
+        minutes = (end - day_start).total_seconds() / 60
+        last = min(SLOTS_PER_DAY, -int(-minutes // SLOT_MINUTES))
+        if last > first:
+            bitmaps[(key, day)] = bitmaps.get((key, day), 0) | bit_range(
+                first, last
+            )
+        if last < SLOTS_PER_DAY:
+            return
+        day, first = day + timedelta(days=1), 0
+
+
+def free_starts(free: int, slots_needed: int) -> int:
+    # bit i fica ligado se os slots i .. i + slots_needed - 1 estao livres
+    starts = free
+    for offset in range(1, slots_needed):
+        starts &= free >> offset
+    return starts
+
+
+def slot_times(day: date, starts: int, tz: tzinfo):
+    day_start = datetime.combine(day, time(), tz)
+    while starts:
+        low_bit = starts & -starts
+        yield day_start + timedelta(
+            minutes=(low_bit.bit_length() - 1) * SLOT_MINUTES
+        )
+        starts ^= low_bit
+
+
+def days_between(start: date, end: date):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from src.config import settings
+from src.models import User
+
+
+class TTLCache:
+    # expiracao fixa, contada do set: o acerto nao renova o prazo. A
+    # invalidacao por evento so vale no worker que fez a alteracao; nos
+    # outros, o ttl e o limite para um usuario desativado (ou sem admin)
+    # deixar de ser aceito, mesmo que continue fazendo requisicoes
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# usuarios autenticados (id, is_active, admin) indexados pelo id do token.
+# alteracoes feitas por outros workers so aparecem depois do ttl
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL
+)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(_mapper, _connection, target):
+    user_cache.invalidate(target.id)
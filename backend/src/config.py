@@ -12,6 +12,39 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_PREWARM: bool = True
+    # replicas de leitura, separadas por virgula
+    DATABASE_REPLICA_URLS: str | None = None
+    REPLICA_RETRY_SECONDS: float = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
+    USER_CACHE_TTL: float = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+    CLINIC_TIMEZONE: str = "America/Sao_Paulo"
+    # se definido, /metrics exige "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN: str | None = None
+    # profiler de SQL por request (so desenvolvimento)
+    QUERY_PROFILER: bool = False
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 3
+    # agendador de jobs dentro da API; sem isso, rodar
+    # "python -m src.scheduler run" como processo separado
+    SCHEDULER_ENABLED: bool = False
+    SCHEDULER_TICK_SECONDS: float = 10
+    SCHEDULER_BATCH_SIZE: int = 500
+    SCHEDULER_MAX_BATCHES: int = 20
+    # meses de consultas mantidos em appointment; sem valor, nada e removido.
+    # Com APPOINTMENT_ARCHIVE_DIR as particoes antigas viram .csv.gz la
+    APPOINTMENT_RETENTION_MONTHS: int | None = None
+    APPOINTMENT_ARCHIVE_DIR: str | None = None
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
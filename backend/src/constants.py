@@ -1 +1,93 @@
-PERSON_FIELDS = ['name', 'birth_date', 'document', 'gender', 'phone_number', 'email']
\ No newline at end of file
+PERSON_FIELDS = ['name', 'birth_date', 'document', 'gender', 'phone_number', 'email']
+
+ACTIVE_APPOINTMENT_STATUSES = ['scheduled', 'confirmed', 'in_progress']
+# consultas nesses status nao ocupam a agenda do profissional
+FREE_SLOT_STATUSES = ['cancelled', 'no_show']
+# mudancas de status permitidas na alteracao em lote; concluida, cancelada
+# e falta sao finais
+STATUS_TRANSITIONS = {
+    'scheduled': ['confirmed', 'in_progress', 'completed', 'cancelled', 'no_show'],
+    'confirmed': ['in_progress', 'completed', 'cancelled', 'no_show'],
+    'in_progress': ['completed'],
+    'completed': [],
+    'cancelled': [],
+    'no_show': [],
+}
+MAX_BULK_IDS = 10000
+
+# jobs do agendador
+NO_SHOW_GRACE_MINUTES = 60
+REMINDER_LEAD_HOURS = 24
+# janela (dias antes e depois de hoje) recalculada em appointment_daily_stats
+STATS_REFRESH_DAYS = 7
+# namespace dos advisory locks do agendador (pg_try_advisory_lock(int, int))
+SCHEDULER_LOCK_CLASS = 7240
+# particoes mensais de appointment criadas a frente do mes atual; agendar
+# alem disso responde 400
+PARTITION_MONTHS_AHEAD = 12
+
+APPOINTMENT_DURATION_MINUTES = 30
+# limite usado para podar a busca de agenda pelo inicio do atendimento
+MAX_APPOINTMENT_MINUTES = 8 * 60
+SLOT_MINUTES = 15
+MAX_AVAILABILITY_DAYS = 31
+MAX_STATS_DAYS = 366
+# horario de inicio e fim (exclusivo) de cada turno
+WORK_SHIFT_HOURS = {
+    'morning': (8, 12),
+    'afternoon': (13, 18),
+    'full_day': (8, 18),
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+# linhas por lote (e por row group no parquet) nas exportacoes
+EXPORT_BATCH_SIZE = 5000
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# mesmo limite padrao do pg_trgm (pg_trgm.similarity_threshold)
+SEARCH_SIMILARITY_THRESHOLD = 0.3
+
+# campos aceitos em ?campo__op= e ?sort= nas listagens; ordenacao so em
+# colunas NOT NULL para o cursor continuar valido
+PATIENT_FILTER_FIELDS = (
+    'person_id',
+    'insurance_provider',
+    'insurance_number',
+    'blood_type',
+    'organ_donor',
+    'created_at',
+    'deleted_at',
+)
+PATIENT_SORT_FIELDS = ('id', 'created_at')
+PROVIDER_FILTER_FIELDS = (
+    'person_id',
+    'specialty',
+    'work_shift',
+    'license_number',
+    'active',
+    'created_at',
+    'deleted_at',
+)
+PROVIDER_SORT_FIELDS = ('id', 'specialty', 'work_shift', 'created_at')
+APPOINTMENT_FILTER_FIELDS = (
+    'patient_id',
+    'provider_id',
+    'date_hour',
+    'end_hour',
+    'status',
+    'created_at',
+)
+APPOINTMENT_SORT_FIELDS = (
+    'id',
+    'date_hour',
+    'end_hour',
+    'status',
+    'created_at',
+)
+STATEMENT_CACHE_SIZE = 256
@@ -1,4 +1,9 @@
-from .crud_appointment import create_appointment, get_appointment, get_appointments, update_appointment
-from .crud_patient import create_patient, get_patients, update_patient, delete_patient
-from .crud_provider import create_provider, get_provider, get_providers, update_provider, delete_provider
-from .crud_users import authenticate, create_user
\ No newline at end of file
+from .availability import get_availability
+from .bulk_import import import_patients, import_providers
+from .crud_appointment import create_appointment, get_appointment, get_appointments, stream_appointments, transition_appointments, update_appointment
+from .crud_patient import create_patient, get_patient, get_patients, stream_patients, update_patient, delete_patient
+from .crud_provider import create_provider, get_provider, get_providers, stream_providers, update_provider, delete_provider
+from .crud_users import authenticate, authenticate_async, create_user
+from .dashboard import get_appointment_stats
+from .exports import export_appointments, export_patients
+from .search import search_people
\ No newline at end of file
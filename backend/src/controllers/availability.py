@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.availability import (days_between, free_starts, mark_busy,
+                              shift_mask, slot_times)
+from src.config import settings
+from src.constants import (FREE_SLOT_STATUSES, MAX_APPOINTMENT_MINUTES,
+                           MAX_AVAILABILITY_DAYS, SLOT_MINUTES)
+from src.models import AppointmentModel, ProviderModel
+
+
+def get_availability(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    duration: int,
+    specialty: str | None = None,
+    work_shift: str | None = None,
+    provider_ids: list[int] | None = None,
+) -> list[dict]:
+    tz = ZoneInfo(settings.CLINIC_TIMEZONE)
+    start = start if start.tzinfo else start.replace(tzinfo=tz)
+    end = end if end.tzinfo else end.replace(tzinfo=tz)
+    if end <= start:
+        raise HTTPException(status_code=400, detail='end must be after start')
+    if end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f'The search window is limited to {MAX_AVAILABILITY_DAYS} days',
+        )
+
+    providers_query = select(
+        ProviderModel.id, ProviderModel.specialty, ProviderModel.work_shift
+    ).where(ProviderModel.deleted_at.is_(None), ProviderModel.active)
+    if specialty is not None:
+        providers_query = providers_query.where(
+            ProviderModel.specialty == specialty
+        )
+    if work_shift is not None:
+        providers_query = providers_query.where(
+            ProviderModel.work_shift == work_shift
+        )
+    if provider_ids:
+        providers_query = providers_query.where(
+            ProviderModel.id.in_(provider_ids)
+        )
+    providers = db.execute(providers_query.order_by(ProviderModel.id)).all()
+    if not providers:
+        return []
+
+    booked = db.execute(
+        select(
+            AppointmentModel.provider_id,
+            AppointmentModel.date_hour,
+            AppointmentModel.end_hour,
+        ).where(
+            AppointmentModel.provider_id.in_([p.id for p in providers]),
+            # atendimentos que comecaram antes da janela podem invadi-la
+            AppointmentModel.date_hour
+            > start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+            AppointmentModel.date_hour < end,
+            AppointmentModel.end_hour > start,
+            AppointmentModel.status.notin_(FREE_SLOT_STATUSES),
+        )
+    ).all()
+
+    busy = {}
+    for provider_id, date_hour, end_hour in booked:
+        mark_busy(busy, provider_id, date_hour, end_hour, tz)
+
+    slots_needed = -(-duration // SLOT_MINUTES)
+    days = list(
+        days_between(start.astimezone(tz).date(), end.astimezone(tz).date())
+    )
+    availability = []
+    for provider in providers:
+        mask = shift_mask(provider.work_shift)
+        slots = []
+        for day in days:
+            free = mask & ~busy.get((provider.id, day), 0)
+            for slot in slot_times(day, free_starts(free, slots_needed), tz):
+                if start <= slot and slot + timedelta(minutes=duration) <= end:
+                    slots.append(slot)
+        if slots:
+            availability.append(
+                {
+                    'provider_id': provider.id,
+                    'specialty': provider.specialty,
+                    'slots': slots,
+                }
+            )
+    return availability
@@ -0,0 +1,145 @@
+from pydantic import ValidationError
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from src.constants import IMPORT_BATCH_SIZE, MAX_IMPORT_ERRORS, PERSON_FIELDS
+from src.models import PatientModel, PersonModel, ProviderModel
+from src.schemas import PatientCreate, ProviderCreate
+from src.versions import bump_versions
+
+
+def import_patients(db: Session, rows) -> dict:
+    return import_person_backed(
+        db, rows, PatientCreate, PatientModel, 'Patient already exists.'
+    )
+
+
+def import_providers(db: Session, rows) -> dict:
+    return import_person_backed(
+        db, rows, ProviderCreate, ProviderModel, 'Provider already exists.'
+    )
+
+
+def import_person_backed(
+    db: Session, rows, schema, model, exists_detail: str
+) -> dict:
+    result = {'inserted': 0, 'failed': 0, 'errors': []}
+    seen_documents = set()
+    batch = []
+
+    for line, row in rows:
+        if row is None:
+            add_import_error(result, line, 'Invalid JSON line.')
+            continue
+        try:
+            item = schema.model_validate(row)
+        except ValidationError as e:
+            detail = '; '.join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors()
+            )
+            add_import_error(result, line, detail)
+            continue
+
+        if item.document in seen_documents:
+            add_import_error(result, line, 'Duplicated document in file.')
+            continue
+        seen_documents.add(item.document)
+
+        batch.append((line, item))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            insert_import_batch(db, batch, model, result, exists_detail)
+            batch = []
+
+    if batch:
+        insert_import_batch(db, batch, model, result, exists_detail)
+    return result
+
+
+def insert_import_batch(
+    db: Session, batch: list, model, result: dict, exists_detail: str
+):
+    # mesma regra do cadastro (insert_person_backed): recurso ativo e
+    # conflito; pessoa sem ele (removida ou so com o outro papel) e
+    # reativada e reaproveitada
+    documents = [item.document for _, item in batch]
+    active, reused = set(), {}
+    for document, person_id, resource_id in db.execute(
+        select(PersonModel.document, PersonModel.id, model.id)
+        .outerjoin(
+            model,
+            and_(model.person_id == PersonModel.id, model.deleted_at.is_(None)),
+        )
+        .where(PersonModel.document.in_(documents))
+        .order_by(PersonModel.id)
+    ):
+        if resource_id is not None:
+            active.add(document)
+        reused.setdefault(document, person_id)
+
+    pending = []
+    for line, item in batch:
+        if item.document in active:
+            add_import_error(result, line, exists_detail)
+        else:
+            pending.append((line, item))
+    if not pending:
+        return
+    reused = {
+        document: person_id
+        for document, person_id in reused.items()
+        if document not in active
+    }
+    new_items = [item for _, item in pending if item.document not in reused]
+
+    # pessoas reaproveitadas voltam num UPDATE; as novas, num INSERT
+    # multi-linha com RETURNING, e o recurso em outro;
+    # cada lote tem sua transacao: se o banco recusar um (ex. documento
+    # inserido por outra requisicao), so ele volta e as linhas dele viram
+    # erro, ja que os lotes anteriores continuam gravados
+    try:
+        person_ids = dict(reused)
+        if reused:
+            db.execute(
+                update(PersonModel)
+                .where(PersonModel.id.in_(reused.values()))
+                .values(deleted_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        if new_items:
+            person_ids.update(
+                db.execute(
+                    insert(PersonModel).returning(
+                        PersonModel.document, PersonModel.id
+                    ),
+                    [
+                        item.model_dump(include=set(PERSON_FIELDS))
+                        for item in new_items
+                    ],
+                ).all()
+            )
+        db.execute(
+            insert(model),
+            [
+                {
+                    'person_id': person_ids[item.document],
+                    **item.model_dump(exclude=set(PERSON_FIELDS)),
+                }
+                for _, item in pending
+            ],
+        )
+        bump_versions(db, model.__tablename__, PersonModel.__tablename__)
+        db.commit()
+    except DBAPIError as e:
+        db.rollback()
+        detail = f'Batch rejected by the database: {str(e.orig).splitlines()[0]}'
+        for line, _ in pending:
+            add_import_error(result, line, detail)
+        return
+    result['inserted'] += len(pending)
+
+
+def add_import_error(result: dict, line: int, detail: str):
+    result['failed'] += 1
+    if len(result['errors']) < MAX_IMPORT_ERRORS:
+        result['errors'].append({'line': line, 'detail': detail})
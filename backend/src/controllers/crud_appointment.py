@@ -1,44 +1,252 @@
+from datetime import timedelta
+
 from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.helpers import get_by_id, search_resource
-from src.models import AppointmentModel, PatientModel, ProviderModel
-from src.schemas import AppointmentCreate, AppointmentUpdate
+from src.constants import APPOINTMENT_DURATION_MINUTES, STATUS_TRANSITIONS
+from src.helpers import (get_by_id, keyset_paginate, list_select,
+                         shaped_select, stream_rows)
+from src.models import AppointmentModel
+from src.schemas import (AppointmentCreate, AppointmentStatusTransition,
+                         AppointmentUpdate)
+from src.shapes import DEFAULT_SHAPE, serialize
+from src.stats import apply_stats_deltas, booking_deltas, status_deltas
+from src.versions import bump_versions
 
 
-def get_appointments(db: Session) -> list[AppointmentModel]:
-    return db.query(AppointmentModel).all()
+APPOINTMENT_SORT = (('date_hour', False), ('id', False))
 
-def get_appointment(db: Session, appointment_id: str) -> AppointmentModel | None:
-    return db.query(AppointmentModel).filter(AppointmentModel.id == appointment_id).first()
 
-def create_appointment(db: Session, appointment_info: AppointmentCreate):
-    db_appointment = AppointmentModel(**appointment_info.model_dump())
-
-    patient = search_resource(table=PatientModel, filters={"id": appointment_info.patient_id}, db=db)
-    provider = search_resource(table=ProviderModel, filters={"id": appointment_info.provider_id}, db=db)
-
-    if patient is None:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    if provider is None:
-        raise HTTPException(status_code=404, detail="Provider not found")
-    
-    db.add(db_appointment)
-    db.commit()
+def get_appointments(
+    db: Session,
+    limit: int,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = APPOINTMENT_SORT,
+) -> dict:
+    return keyset_paginate(
+        db,
+        AppointmentModel,
+        limit,
+        after=after,
+        shape=shape,
+        filters=filters,
+        sort=sort,
+    )
 
-    db.refresh(db_appointment)
-    return db_appointment
+def stream_appointments(
+    db: Session | AsyncSession,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = APPOINTMENT_SORT,
+):
+    stmt, params = list_select(
+        AppointmentModel, shape, filters, sort, after=after, limited=False
+    )
+    return stream_rows(db, stmt, params)
 
-def update_appointment(db: Session, appointment_id: int, appointment: AppointmentUpdate):
-    db_appointment = get_by_id(table=AppointmentModel, id=appointment_id, db=db)
+def get_appointment(
+    db: Session, appointment_id: int, shape: dict = DEFAULT_SHAPE
+) -> dict | None:
+    db_appointment = db.scalars(
+        shaped_select(AppointmentModel, shape).where(
+            AppointmentModel.id == appointment_id
+        )
+    ).one_or_none()
+    return None if db_appointment is None else serialize(db_appointment, shape)
 
-    if db_appointment is None:
-        return None
+def appointment_end(date_hour):
+    return date_hour + timedelta(minutes=APPOINTMENT_DURATION_MINUTES)
 
+FK_NOT_FOUND = {
+    'appointment_patient_id_fkey': 'Patient not found',
+    'appointment_provider_id_fkey': 'Provider not found',
+}
+
+def constraint_name(error) -> str | None:
+    # psycopg2 expoe diag; no asyncpg o erro do driver fica em __cause__
+    diag = getattr(error, 'diag', None)
+    name = (
+        diag.constraint_name if diag is not None
+        else getattr(error.__cause__, 'constraint_name', None)
+    )
+    # nas particoes de appointment as copias da FK ganham sufixo numerico
+    # (appointment_patient_id_fkey1, ...)
+    return name.rstrip('0123456789') if name else name
+
+def execute_booking(db: Session, stmt):
+    # stmt retorna o atendimento e, na alteracao, os valores anteriores de
+    # (provider_id, date_hour, status) para ajustar appointment_daily_stats
+    try:
+        row = db.execute(stmt).one_or_none()
+        if row is None:
+            db.rollback()
+            return None
+        db_appointment, *previous = row
+        apply_stats_deltas(
+            db, booking_deltas(db_appointment, tuple(previous) or None)
+        )
+        bump_versions(db, 'appointment')
+        db.commit()
+        return db_appointment
+    except IntegrityError as e:
+        db.rollback()
+        pgcode = getattr(e.orig, 'pgcode', None)
+        # 23P01 = exclusion_violation (appointment_provider_no_overlap)
+        if pgcode == '23P01':
+            raise HTTPException(
+                status_code=409,
+                detail='The provider already has an appointment at this time.',
+            )
+        # 23514 = check_violation: sem particao para o mes (alem de
+        # PARTITION_MONTHS_AHEAD) ou consulta atravessando a virada do mes
+        if pgcode == '23514':
+            raise HTTPException(
+                status_code=400,
+                detail='Appointments cannot be booked for this date and time.',
+            )
+        # 23503 = foreign_key_violation: paciente/profissional inexistente
+        if pgcode == '23503':
+            detail = FK_NOT_FOUND.get(constraint_name(e.orig))
+            if detail is not None:
+                raise HTTPException(status_code=404, detail=detail)
+        raise
+
+def create_appointment(db: Session, appointment_info: AppointmentCreate):
+    stmt = (
+        insert(AppointmentModel)
+        .values(
+            **appointment_info.model_dump(),
+            end_hour=appointment_end(appointment_info.date_hour),
+        )
+        .returning(AppointmentModel)
+    )
+    return execute_booking(db, stmt)
+
+def update_appointment(db: Session, appointment_id: int, appointment: AppointmentUpdate):
     update_data = appointment.model_dump(exclude_unset=True)
+    if 'date_hour' in update_data:
+        update_data['end_hour'] = appointment_end(update_data['date_hour'])
+
+    if not update_data:
+        return get_by_id(table=AppointmentModel, id=appointment_id, db=db)
+
+    previous = (
+        select(
+            AppointmentModel.id,
+            AppointmentModel.provider_id,
+            AppointmentModel.date_hour,
+            AppointmentModel.status,
+        )
+        .where(AppointmentModel.id == appointment_id)
+        .with_for_update()
+        .subquery('previous')
+    )
+    stmt = (
+        update(AppointmentModel)
+        .where(AppointmentModel.id == previous.c.id)
+        .values(**update_data)
+        .returning(
+            AppointmentModel,
+            previous.c.provider_id,
+            previous.c.date_hour,
+            previous.c.status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return execute_booking(db, stmt)
 
-    for field, value in update_data.items():
-        setattr(db_appointment, field, value)
+def eligible_appointments(sources: list[str]):
+    return select(
+        AppointmentModel.id,
+        AppointmentModel.provider_id,
+        AppointmentModel.date_hour,
+        AppointmentModel.status,
+    ).where(AppointmentModel.status.in_(sources))
 
+def apply_status_transition(db: Session, eligible, status: str) -> list[int]:
+    # um UPDATE so: o subselect (eligible, com o lock) escolhe as linhas e
+    # devolve o status anterior para ajustar appointment_daily_stats; o
+    # commit fica com quem chama
+    previous = eligible.subquery('previous')
+    stmt = (
+        update(AppointmentModel)
+        .where(AppointmentModel.id == previous.c.id)
+        .values(status=status)
+        .returning(
+            AppointmentModel.id,
+            previous.c.provider_id,
+            previous.c.date_hour,
+            previous.c.status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    if rows:
+        apply_stats_deltas(
+            db, status_deltas([row[1:] for row in rows], status)
+        )
+        bump_versions(db, 'appointment')
+    return sorted(row.id for row in rows)
+
+def transition_appointments(
+    db: Session, transition: AppointmentStatusTransition
+) -> dict:
+    status = transition.status.value
+    sources = [
+        source for source, targets in STATUS_TRANSITIONS.items()
+        if status in targets
+    ]
+    if transition.from_status:
+        requested = [item.value for item in transition.from_status]
+        invalid = [source for source in requested if source not in sources]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f'Transition from {invalid[0]} to {status} is not allowed',
+            )
+        sources = requested
+    if (
+        transition.ids is None
+        and transition.provider_id is None
+        and transition.start is None
+        and transition.end is None
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail='Provide ids, provider_id or a start/end range',
+        )
+    if (
+        transition.start is not None
+        and transition.end is not None
+        and transition.end <= transition.start
+    ):
+        raise HTTPException(
+            status_code=400, detail='end must be after start'
+        )
+
+    eligible = eligible_appointments(sources).with_for_update()
+    if transition.ids is not None:
+        eligible = eligible.where(AppointmentModel.id.in_(transition.ids))
+    if transition.provider_id is not None:
+        eligible = eligible.where(
+            AppointmentModel.provider_id == transition.provider_id
+        )
+    if transition.start is not None:
+        eligible = eligible.where(AppointmentModel.date_hour >= transition.start)
+    if transition.end is not None:
+        eligible = eligible.where(AppointmentModel.date_hour < transition.end)
+    ids = apply_status_transition(db, eligible, status)
     db.commit()
-    return db_appointment
\ No newline at end of file
+
+    skipped = sorted(set(transition.ids or ()) - set(ids))
+    return {
+        'status': status,
+        'updated': len(ids),
+        'ids': ids,
+        'skipped_ids': skipped,
+    }
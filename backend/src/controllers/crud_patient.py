@@ -1,91 +1,86 @@
-from datetime import datetime
-
-from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.constants import PERSON_FIELDS
-from src.helpers import (create_person, get_by_id, search_resource,
-                         verify_active_appointments)
-from src.models import AppointmentModel, PatientModel, PersonModel
+from src.helpers import (insert_person_backed, keyset_paginate, list_select,
+                         shaped_select, soft_delete_person_backed, stream_rows,
+                         update_person_backed)
+from src.models import AppointmentModel, PatientModel
 from src.schemas import PatientCreate, PatientUpdate
-
-
-def get_patients(db: Session) -> list[PatientModel]:
-    return db.query(PatientModel).all()
-
-def create_patient(db: Session, patient_info: PatientCreate):
-    person_exists = search_resource(
-        table=PersonModel, filters={'document': patient_info.document}, db=db
+from src.shapes import DEFAULT_SHAPE, serialize
+from src.versions import bump_versions
+
+
+PATIENT_SORT = (('id', False),)
+
+
+def get_patients(
+    db: Session,
+    limit: int,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = PATIENT_SORT,
+) -> dict:
+    return keyset_paginate(
+        db,
+        PatientModel,
+        limit,
+        after=after,
+        shape=shape,
+        filters=filters,
+        sort=sort,
     )
 
-    if person_exists:
-        patient_exists = search_resource(
-            table=PatientModel,
-            filters={'person_id': person_exists.id},
-            db=db,
-        )
-        # se o paciente estiver ativo no sistema, nao cria um novo
-        if patient_exists and patient_exists.deleted_at is None:
-            raise HTTPException(
-            status_code=409,
-            detail='Patient already exists.',
+def get_patient(db: Session, patient_id: int, shape: dict = DEFAULT_SHAPE):
+    db_patient = db.scalars(
+        shaped_select(PatientModel, shape).where(
+            PatientModel.id == patient_id, PatientModel.deleted_at.is_(None)
         )
-        person_id = patient_exists.person_id
-        person_exists.deleted_at = None
-        db.commit()
-    else:   
-        person = create_person(resource=patient_info, db=db)
-        person_id = person.id
-
-    db_patient = PatientModel(
-        person_id=person_id,
-        insurance_provider=patient_info.insurance_provider,
-        insurance_number=patient_info.insurance_number,
-        blood_type=patient_info.blood_type,
-        organ_donor=patient_info.organ_donor,
+    ).one_or_none()
+    return None if db_patient is None else serialize(db_patient, shape)
+
+def stream_patients(
+    db: Session | AsyncSession,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = PATIENT_SORT,
+):
+    stmt, params = list_select(
+        PatientModel, shape, filters, sort, after=after, limited=False
     )
+    return stream_rows(db, stmt, params)
 
-    db.add(db_patient)
+def create_patient(db: Session, patient_info: PatientCreate):
+    db_patient = insert_person_backed(
+        db, PatientModel, patient_info, detail='Patient already exists.'
+    )
+    if db_patient is None:
+        # nada foi alterado: as ETags de patient continuam validas
+        db.rollback()
+        return None
+    bump_versions(db, 'patient', 'person')
     db.commit()
-
-    db.refresh(db_patient)
     return db_patient
 
 
 def delete_patient(db: Session, patient_id: int):
-    db_patient = get_by_id(table=PatientModel, id=patient_id, db=db)
-    if db_patient is None:
-        raise HTTPException(status_code=404, detail='Patient not found')
-    active_appointments = verify_active_appointments(
-        filter_id_column=AppointmentModel.patient_id, id=patient_id, db=db
+    soft_delete_person_backed(
+        db,
+        PatientModel,
+        patient_id,
+        appointment_column=AppointmentModel.patient_id,
+        name='Patient',
     )
-    if active_appointments:
-        raise HTTPException(
-            status_code=409,
-            detail='This patient cannot be deleted because they have an in-progress, scheduled, or confirmed appointment.',
-        )
-    db_person = get_by_id(table=PersonModel, id=db_patient.person_id, db=db)
-
-    now = datetime.now()
-    db_patient.deleted_at = now
-    db_person.deleted_at = now
-
+    bump_versions(db, 'patient', 'person')
     db.commit()
 
 
 def update_patient(db: Session, patient_id: int, patient: PatientUpdate):
-    db_patient = search_resource(table=PatientModel, filters={'patient_id': patient_id, "deleted_at": "null"}, db=db)
-    if db_patient is None or db_patient.deleted_at is not None:
+    db_patient = update_person_backed(db, PatientModel, patient_id, patient)
+    if db_patient is None:
+        # nada foi alterado: as ETags de patient continuam validas
+        db.rollback()
         return None
-
-    db_person = get_by_id(table=PersonModel, id=db_patient.person_id, db=db)
-
-    update_data = patient.model_dump(exclude_unset=True)
-
-    for field, value in update_data.items():
-        if field in PERSON_FIELDS:
-            setattr(db_person, field, value)
-        else:
-            setattr(db_patient, field, value)
-
+    bump_versions(db, 'patient', 'person')
     db.commit()
     return db_patient
@@ -1,95 +1,88 @@
-from datetime import datetime
-
-from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.constants import PERSON_FIELDS
-from src.helpers import (create_person, get_by_id, search_resource,
-                         verify_active_appointments)
-from src.models import PersonModel, ProviderModel
+from src.helpers import (insert_person_backed, keyset_paginate, list_select,
+                         shaped_select, soft_delete_person_backed, stream_rows,
+                         update_person_backed)
+from src.models import AppointmentModel, ProviderModel
 from src.schemas import ProviderCreate, ProviderUpdate
-
-
-def get_providers(db: Session) -> list[ProviderModel]:
-    return db.query(ProviderModel).all()
-
-
-def get_provider(db: Session, provider_name: str) -> ProviderModel | None:
-    return db.query(ProviderModel).filter(ProviderModel.name == provider_name)
-
-
-def create_provider(db: Session, provider_info: ProviderCreate):
-    person_exists = search_resource(
-        table=PersonModel, filters={'document': provider_info.document}, db=db
+from src.shapes import DEFAULT_SHAPE, serialize
+from src.versions import bump_versions
+
+
+PROVIDER_SORT = (('id', False),)
+
+
+def get_providers(
+    db: Session,
+    limit: int,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = PROVIDER_SORT,
+) -> dict:
+    return keyset_paginate(
+        db,
+        ProviderModel,
+        limit,
+        after=after,
+        shape=shape,
+        filters=filters,
+        sort=sort,
     )
-    if person_exists:
-        provider_exists = search_resource(
-            table=ProviderModel,
-            filters={'person_id': person_exists.id},
-            db=db,
-        )
-        # se o paciente estiver ativo no sistema, nao cria um novo
-        if provider_exists and provider_exists.deleted_at is None:
-            raise HTTPException(
-            status_code=409,
-            detail='Provider already exists.',
+
+def get_provider(db: Session, provider_id: int, shape: dict = DEFAULT_SHAPE):
+    db_provider = db.scalars(
+        shaped_select(ProviderModel, shape).where(
+            ProviderModel.id == provider_id, ProviderModel.deleted_at.is_(None)
         )
-        person_id = provider_exists.person_id
-        person_exists.deleted_at = None
-        db.commit()
-    else:   
-        person = create_person(resource=provider_info, db=db)
-        person_id = person.id
-        
-    db_provider = ProviderModel(
-        person_id=person_id,
-        specialty=provider_info.specialty,
-        work_shift=provider_info.work_shift,
-        license_number=provider_info.license_number,
-        active=provider_info.active,
-        availability_notes=provider_info.availability_notes,
+    ).one_or_none()
+    return None if db_provider is None else serialize(db_provider, shape)
+
+def stream_providers(
+    db: Session | AsyncSession,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = PROVIDER_SORT,
+):
+    stmt, params = list_select(
+        ProviderModel, shape, filters, sort, after=after, limited=False
     )
+    return stream_rows(db, stmt, params)
 
-    db.add(db_provider)
+def create_provider(db: Session, provider_info: ProviderCreate):
+    db_provider = insert_person_backed(
+        db, ProviderModel, provider_info, detail='Provider already exists.'
+    )
+    if db_provider is None:
+        # nada foi alterado: as ETags de provider continuam validas
+        db.rollback()
+        return None
+    bump_versions(db, 'provider', 'person')
     db.commit()
-
-    db.refresh(db_provider)
     return db_provider
 
 
 def delete_provider(db: Session, provider_id: int):
-    db_provider = get_by_id(table=ProviderModel, id=provider_id, db=db)
-    if db_provider is None:
-        raise HTTPException(status_code=404, detail='Provider not found')
-    active_appointments = verify_active_appointments()
-    if active_appointments:
-        raise HTTPException(
-            status_code=409,
-            detail='This provider cannot be deleted because they have an in-progress, scheduled, or confirmed appointment.',
-        )
-    db_person = get_by_id(table=PersonModel, id=db_provider.person_id, db=db)
-
-    now = datetime.now()
-    db_provider.deleted_at = now
-    db_person.deleted_at = now
-
+    soft_delete_person_backed(
+        db,
+        ProviderModel,
+        provider_id,
+        appointment_column=AppointmentModel.provider_id,
+        name='Provider',
+    )
+    bump_versions(db, 'provider', 'person')
     db.commit()
 
 
 def update_provider(db: Session, provider_id: int, provider: ProviderUpdate):
-    db_provider = get_by_id(table=ProviderModel, id=provider_id, db=db)
-
+    db_provider = update_person_backed(
+        db, ProviderModel, provider_id, provider
+    )
     if db_provider is None:
+        # nada foi alterado: as ETags de provider continuam validas
+        db.rollback()
         return None
-
-    db_person = get_by_id(table=PersonModel, id=db_provider.person_id, db=db)
-
-    update_data = provider.dict(exclude_unset=True)
-
-    for field, value in update_data.items():
-        if field in PERSON_FIELDS:
-            setattr(db_person, field, value)
-        else:
-            setattr(db_provider, field, value)
-
+    bump_versions(db, 'provider', 'person')
     db.commit()
     return db_provider
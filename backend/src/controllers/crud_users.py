@@ -1,19 +1,23 @@
 from fastapi import HTTPException
 from sqlalchemy.exc import ArgumentError
 from sqlalchemy.orm import Session
+from src.helpers import run_db
 from src.models import User
 from src.schemas import UserCreate
-from src.security import get_password_hash, verify_password
+from src.security import (get_password_hash, verify_password,
+                          verify_password_async)
 
 
-def create_user(db: Session, user: UserCreate):
+def create_user(
+    db: Session, user: UserCreate, hashed_password: str | None = None
+):
     db_user = get_user(db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     db_user = User(
         email=user.email,
         username=user.username,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=hashed_password or get_password_hash(user.password),
         admin=user.admin,
     )
     db.add(db_user)
@@ -34,4 +38,14 @@ def authenticate(session: Session, username: str, password: str):
     db_user = get_user(db=session, username=username)
     if not db_user or not verify_password(password, db_user.hashed_password):
         return None
-    return db_user
\ No newline at end of file
+    return db_user
+
+
+async def authenticate_async(session, username: str, password: str):
+    # busca no banco via run_db e verifica o hash no pool do bcrypt
+    db_user = await run_db(session, get_user, username=username)
+    if not db_user or not await verify_password_async(
+        password, db_user.hashed_password
+    ):
+        return None
+    return db_user
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.constants import MAX_STATS_DAYS
+from src.models import AppointmentDailyStatsModel as Stats
+
+
+def get_appointment_stats(
+    db: Session,
+    start: date,
+    end: date,
+    provider_ids: list[int] | None = None,
+) -> list[dict]:
+    if end < start:
+        raise HTTPException(
+            status_code=400, detail='end must not be before start'
+        )
+    if end - start >= timedelta(days=MAX_STATS_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f'The window cannot exceed {MAX_STATS_DAYS} days',
+        )
+
+    # le so o resumo: uma linha por dia x profissional x status
+    stmt = (
+        select(Stats.day, Stats.provider_id, Stats.status, Stats.count)
+        .where(Stats.day >= start, Stats.day <= end, Stats.count != 0)
+        .order_by(Stats.day, Stats.provider_id)
+    )
+    if provider_ids:
+        stmt = stmt.where(Stats.provider_id.in_(provider_ids))
+
+    result = {}
+    for day, provider_id, status, count in db.execute(stmt):
+        entry = result.setdefault(
+            (day, provider_id),
+            {'day': day, 'provider_id': provider_id, 'counts': {}, 'total': 0},
+        )
+        entry['counts'][status] = count
+        entry['total'] += count
+    return list(result.values())
@@ -0,0 +1,108 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from src.config import settings
+from src.constants import EXPORT_BATCH_SIZE
+from src.helpers import stream_rows
+from src.models import (AppointmentModel, PatientModel, PersonModel,
+                        ProviderModel)
+
+PatientPerson = aliased(PersonModel, name='patient_person')
+ProviderPerson = aliased(PersonModel, name='provider_person')
+
+
+def export_appointments(
+    db: Session | AsyncSession,
+    start: date,
+    end: date,
+    provider_ids: list[int] | None = None,
+    statuses: list[str] | None = None,
+    insurance_providers: list[str] | None = None,
+):
+    if end < start:
+        raise HTTPException(
+            status_code=400, detail='end must not be before start'
+        )
+    # dias no fuso da clinica, como no painel
+    timezone = ZoneInfo(settings.CLINIC_TIMEZONE)
+    start_at = datetime.combine(start, time.min, timezone)
+    end_at = datetime.combine(end + timedelta(days=1), time.min, timezone)
+
+    stmt = (
+        select(
+            PatientModel.insurance_provider,
+            PatientModel.insurance_number,
+            AppointmentModel.id.label('appointment_id'),
+            AppointmentModel.date_hour,
+            AppointmentModel.end_hour,
+            AppointmentModel.status,
+            AppointmentModel.reason,
+            AppointmentModel.patient_id,
+            PatientPerson.name.label('patient_name'),
+            PatientPerson.document.label('patient_document'),
+            AppointmentModel.provider_id,
+            ProviderPerson.name.label('provider_name'),
+            ProviderModel.specialty,
+            ProviderModel.license_number,
+        )
+        .join(PatientModel, AppointmentModel.patient_id == PatientModel.id)
+        .join(PatientPerson, PatientModel.person_id == PatientPerson.id)
+        .join(ProviderModel, AppointmentModel.provider_id == ProviderModel.id)
+        .join(ProviderPerson, ProviderModel.person_id == ProviderPerson.id)
+        .where(
+            AppointmentModel.date_hour >= start_at,
+            AppointmentModel.date_hour < end_at,
+        )
+        # agrupado por convenio para o faturamento
+        .order_by(
+            PatientModel.insurance_provider,
+            AppointmentModel.date_hour,
+            AppointmentModel.id,
+        )
+    )
+    if provider_ids:
+        stmt = stmt.where(AppointmentModel.provider_id.in_(provider_ids))
+    if statuses:
+        stmt = stmt.where(AppointmentModel.status.in_(statuses))
+    if insurance_providers:
+        stmt = stmt.where(
+            PatientModel.insurance_provider.in_(insurance_providers)
+        )
+    return stmt.selected_columns, stream_rows(
+        db, stmt, batch_size=EXPORT_BATCH_SIZE, scalars=False
+    )
+
+
+def export_patients(
+    db: Session | AsyncSession,
+    insurance_providers: list[str] | None = None,
+):
+    stmt = (
+        select(
+            PatientModel.insurance_provider,
+            PatientModel.insurance_number,
+            PatientModel.id.label('patient_id'),
+            PatientModel.medical_record_number,
+            PersonModel.name,
+            PersonModel.document,
+            PersonModel.birth_date,
+            PersonModel.gender,
+            PersonModel.phone_number,
+            PersonModel.email,
+            PatientModel.created_at,
+        )
+        .join(PersonModel, PatientModel.person_id == PersonModel.id)
+        .where(PatientModel.deleted_at.is_(None))
+        .order_by(PatientModel.insurance_provider, PatientModel.id)
+    )
+    if insurance_providers:
+        stmt = stmt.where(
+            PatientModel.insurance_provider.in_(insurance_providers)
+        )
+    return stmt.selected_columns, stream_rows(
+        db, stmt, batch_size=EXPORT_BATCH_SIZE, scalars=False
+    )
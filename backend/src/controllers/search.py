@@ -0,0 +1,85 @@
+from sqlalchemy import and_, case, func, literal, or_, select
+from sqlalchemy.orm import Session
+from src.models import PatientModel, PersonModel, ProviderModel
+from src.search import people_index
+
+
+def escape_like(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
+
+
+def people_select(kind: str | None = None):
+    stmt = (
+        select(
+            PersonModel.id.label('person_id'),
+            PersonModel.name,
+            PersonModel.document,
+            PersonModel.email,
+            PersonModel.phone_number,
+            PatientModel.id.label('patient_id'),
+            ProviderModel.id.label('provider_id'),
+        )
+        .outerjoin(
+            PatientModel,
+            and_(
+                PatientModel.person_id == PersonModel.id,
+                PatientModel.deleted_at.is_(None),
+            ),
+        )
+        .outerjoin(
+            ProviderModel,
+            and_(
+                ProviderModel.person_id == PersonModel.id,
+                ProviderModel.deleted_at.is_(None),
+            ),
+        )
+        .where(PersonModel.deleted_at.is_(None))
+    )
+    if kind == 'patient':
+        return stmt.where(PatientModel.id.is_not(None))
+    if kind == 'provider':
+        return stmt.where(ProviderModel.id.is_not(None))
+    return stmt.where(
+        or_(PatientModel.id.is_not(None), ProviderModel.id.is_not(None))
+    )
+
+
+def search_people(
+    db: Session, query: str, limit: int, kind: str | None = None
+) -> list[dict]:
+    query = query.strip()
+    if db.get_bind().dialect.name != 'postgresql':
+        people_index.track()
+        people_index.ensure(
+            lambda: [dict(row) for row in db.execute(people_select()).mappings()]
+        )
+        return people_index.search(query, limit, kind=kind)
+
+    # cada condicao usa um indice (gin_trgm_ops no nome/email,
+    # text_pattern_ops no documento/telefone) e o planner combina via BitmapOr
+    contains = f'%{escape_like(query)}%'
+    prefix = f'{escape_like(query)}%'
+    score = func.greatest(
+        func.word_similarity(query, PersonModel.name),
+        func.similarity(PersonModel.email, query),
+        case((PersonModel.document.like(prefix), 1.0), else_=0.0),
+        case((PersonModel.phone_number.like(prefix), 0.9), else_=0.0),
+    ).label('score')
+    stmt = (
+        people_select(kind)
+        .add_columns(score)
+        .where(
+            or_(
+                literal(query).op('<%')(PersonModel.name),
+                PersonModel.name.ilike(contains),
+                PersonModel.email.ilike(contains),
+                PersonModel.document.like(prefix),
+                PersonModel.phone_number.like(prefix),
+            )
+        )
+        .order_by(score.desc(), PersonModel.name)
+        .limit(limit)
+    )
+    return [dict(row) for row in db.execute(stmt).mappings()]
@@ -1,8 +1,133 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from src.config import settings
+from src.pool import (InstrumentedAsyncQueuePool, InstrumentedQueuePool,
+                      pool_stats)
+from src.replicas import ReplicaSet, RoutingSession
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url).set(drivername='postgresql+asyncpg')
+    return url.render_as_string(hide_password=False)
+
+
+def get_async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return to_async_url(settings.DATABASE_URL)
+
+
+def get_replica_urls() -> list[str]:
+    return [
+        url.strip()
+        for url in (settings.DATABASE_REPLICA_URLS or '').split(',')
+        if url.strip()
+    ]
+
+
+def pool_options() -> dict:
+    return {
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options()
+)
+# os objetos retornados pelas rotas sao serializados depois do commit,
+# fora da thread/greenlet do banco: nao podem expirar no commit
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+replica_engines = [
+    create_engine(url, poolclass=InstrumentedQueuePool, **pool_options())
+    for url in get_replica_urls()
+]
+replicas = ReplicaSet(replica_engines)
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    info={'replicas': replicas},
+)
+
+# o caminho sincrono continua sendo o padrao (e o usado por scripts);
+# com DATABASE_ASYNC=true as rotas usam sessoes asyncpg
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+async_replicas = ReplicaSet([])
+AsyncReadSessionLocal = None
+if settings.DATABASE_ASYNC:
+    async_engine = create_async_engine(
+        get_async_database_url(),
+        poolclass=InstrumentedAsyncQueuePool,
+        **pool_options(),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+    async_replica_engines = [
+        create_async_engine(
+            to_async_url(url),
+            poolclass=InstrumentedAsyncQueuePool,
+            **pool_options(),
+        )
+        for url in get_replica_urls()
+    ]
+    # o roteamento roda na Session sincrona interna, com os sync_engine
+    async_replicas = ReplicaSet(
+        [replica.sync_engine for replica in async_replica_engines]
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        info={'replicas': async_replicas},
+    )
+
+
+def prewarm_pool():
+    connections = [engine.connect() for _ in range(engine.pool.size())]
+    for connection in connections:
+        connection.close()
+
+
+async def prewarm_async_pool():
+    connections = []
+    for _ in range(async_engine.pool.size()):
+        connections.append(await async_engine.connect())
+    for connection in connections:
+        await connection.close()
+
+
+def get_pool_stats() -> dict:
+    stats = {'sync': pool_stats(engine.pool)}
+    if async_engine is not None:
+        stats['async'] = pool_stats(async_engine.pool)
+    if replica_engines:
+        stats['replicas'] = replica_pool_stats(replicas)
+    if async_replica_engines:
+        stats['async_replicas'] = replica_pool_stats(async_replicas)
+    return stats
+
+
+def replica_pool_stats(replica_set: ReplicaSet) -> list:
+    return [
+        {**replica, **pool_stats(replica_engine.pool)}
+        for replica, replica_engine in zip(
+            replica_set.stats(), replica_set.engines
+        )
+    ]
+
+
+Base = declarative_base()
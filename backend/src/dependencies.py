@@ -1,14 +1,28 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from src.cache import user_cache
 from src.config import settings
-from src.database import SessionLocal
-from src.models import User
-from src.schemas import TokenPayload
+from src.constants import (APPOINTMENT_FILTER_FIELDS, APPOINTMENT_SORT_FIELDS,
+                           PATIENT_FILTER_FIELDS, PATIENT_SORT_FIELDS,
+                           PROVIDER_FILTER_FIELDS, PROVIDER_SORT_FIELDS)
+from src.controllers.crud_appointment import APPOINTMENT_SORT
+from src.controllers.crud_patient import PATIENT_SORT
+from src.controllers.crud_provider import PROVIDER_SORT
+from src.filters import RESERVED_PARAMS, parse_filters, parse_sort
+from src.database import (AsyncReadSessionLocal, AsyncSessionLocal,
+                          ReadSessionLocal, SessionLocal)
+from src.helpers import run_db
+from src.models import AppointmentModel, PatientModel, ProviderModel, User
+from src.schemas import AuthenticatedUser, TokenPayload
+from src.shapes import parse_shape
+from src.versions import (APPOINTMENT_TABLES, PATIENT_TABLES, PROVIDER_TABLES,
+                          get_versions, http_date, not_modified, validators)
 
 oauth2 = OAuth2PasswordBearer(tokenUrl="/login/")
 
@@ -21,11 +35,50 @@ def get_db():
         db.close()
 
 
-SessionDep = Annotated[Session, Depends(get_db)]
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+SessionDep = Annotated[
+    Session | AsyncSession,
+    Depends(get_async_db if settings.DATABASE_ASYNC else get_db),
+]
+
+# cookie gravado depois de uma escrita: as leituras seguintes do mesmo
+# cliente ficam no primario ate a replica alcancar
+PRIMARY_COOKIE = 'read_primary'
+
+
+def get_read_db(request: Request):
+    if request.cookies.get(PRIMARY_COOKIE):
+        yield from get_db()
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    session_factory = AsyncReadSessionLocal
+    if request.cookies.get(PRIMARY_COOKIE):
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
+ReadSessionDep = Annotated[
+    Session | AsyncSession,
+    Depends(get_async_read_db if settings.DATABASE_ASYNC else get_read_db),
+]
 TokenDep = Annotated[str, Depends(oauth2)]
 
 
-async def get_current_user(session: SessionDep, token: TokenDep) -> User:
+async def get_current_user(
+    session: SessionDep, token: TokenDep
+) -> AuthenticatedUser:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -37,12 +90,107 @@ async def get_current_user(session: SessionDep, token: TokenDep) -> User:
             detail="Could not validate credentials",
         )
 
-    user = session.get(User, token_data.sub)
+    user = user_cache.get(token_data.sub)
     if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+        db_user = await run_db(session, Session.get, User, token_data.sub)
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = AuthenticatedUser.model_validate(db_user)
+        user_cache.set(user.id, user)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
\ No newline at end of file
+CurrentUser = Annotated[AuthenticatedUser, Depends(get_current_user)]
+
+
+
+def response_shape(model):
+    # ?expand=person,patient.person e ?fields=name,person.email
+    def dependency(expand: str | None = None, fields: str | None = None):
+        return parse_shape(model, expand, fields)
+
+    return Depends(dependency)
+
+
+PatientShape = Annotated[dict, response_shape(PatientModel)]
+ProviderShape = Annotated[dict, response_shape(ProviderModel)]
+AppointmentShape = Annotated[dict, response_shape(AppointmentModel)]
+
+
+
+def list_query(model, filter_fields, sort_fields, default_sort):
+    # ?status__in=a,b&date_hour__gte=...&sort=-date_hour,status
+    def dependency(request: Request, sort: str | None = None):
+        params = [
+            (key, value)
+            for key, value in request.query_params.multi_items()
+            if key not in RESERVED_PARAMS
+        ]
+        return {
+            'filters': parse_filters(model, params, filter_fields),
+            'sort': parse_sort(sort, sort_fields, default_sort),
+        }
+
+    return Depends(dependency)
+
+
+PatientQuery = Annotated[
+    dict,
+    list_query(
+        PatientModel, PATIENT_FILTER_FIELDS, PATIENT_SORT_FIELDS, PATIENT_SORT
+    ),
+]
+ProviderQuery = Annotated[
+    dict,
+    list_query(
+        ProviderModel,
+        PROVIDER_FILTER_FIELDS,
+        PROVIDER_SORT_FIELDS,
+        PROVIDER_SORT,
+    ),
+]
+AppointmentQuery = Annotated[
+    dict,
+    list_query(
+        AppointmentModel,
+        APPOINTMENT_FILTER_FIELDS,
+        APPOINTMENT_SORT_FIELDS,
+        APPOINTMENT_SORT,
+    ),
+]
+
+
+
+def conditional_get(tables: tuple):
+    # le so os contadores de versao; se o cliente ja tem a representacao
+    # atual responde 304 antes de consultar ou serializar as linhas
+    async def dependency(
+        request: Request, response: Response, session: ReadSessionDep
+    ) -> dict:
+        versions = await run_db(session, get_versions, tables)
+        etag, last_modified = validators(
+            versions, f'{request.url.path}?{request.url.query}'
+        )
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(last_modified),
+            'Cache-Control': 'no-cache',
+        }
+        if not_modified(
+            request.headers.get('if-none-match'),
+            request.headers.get('if-modified-since'),
+            etag,
+            last_modified,
+        ):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return Depends(dependency)
+
+
+PatientVersion = Annotated[dict, conditional_get(PATIENT_TABLES)]
+ProviderVersion = Annotated[dict, conditional_get(PROVIDER_TABLES)]
+AppointmentVersion = Annotated[dict, conditional_get(APPOINTMENT_TABLES)]
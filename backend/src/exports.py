@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet e opcional
+    pa = pq = None
+
+MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def plain(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(batches, names: list[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    async for batch in batches:
+        writer.writerows(map(plain, row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def ndjson_chunks(batches, names: list[str]):
+    async for batch in batches:
+        yield ''.join(
+            json.dumps(dict(zip(names, map(plain, row)))) + '\n'
+            for row in batch
+        )
+
+
+def arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pa.timestamp('us', tz='UTC')
+    return {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        date: pa.date32(),
+        UUID: pa.string(),
+    }.get(python_type, pa.string())
+
+
+class ChunkSink:
+    # destino do ParquetWriter: guarda os bytes escritos ate o proximo yield
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def parquet_chunks(batches, columns):
+    # um row group por lote: so o lote atual fica em memoria
+    schema = pa.schema([(column.name, arrow_type(column)) for column in columns])
+    uuids = [
+        index
+        for index, column in enumerate(columns)
+        if column.type.python_type is UUID
+    ]
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    async for batch in batches:
+        values = [list(column) for column in zip(*batch)]
+        for index in uuids:
+            values[index] = [plain(value) for value in values[index]]
+        writer.write_table(pa.Table.from_arrays(values, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(batches, columns, export_format: str):
+    if export_format == 'parquet':
+        if pa is None:
+            raise HTTPException(
+                status_code=400,
+                detail='Parquet export requires pyarrow to be installed',
+            )
+        return parquet_chunks(batches, columns)
+    names = [column.name for column in columns]
+    if export_format == 'csv':
+        return csv_chunks(batches, names)
+    return ndjson_chunks(batches, names)
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+# parametros da listagem que nao sao filtros
+RESERVED_PARAMS = {'limit', 'after', 'stream', 'expand', 'fields', 'sort'}
+# valores especiais herdados do search_resource
+NULL_SENTINELS = {'null': 'is_null', 'not_null': 'not_null'}
+NULL_OPERATORS = set(NULL_SENTINELS.values())
+
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'in': lambda column, value: column.in_(value),
+    'is_null': lambda column, _value: column.is_(None),
+    'not_null': lambda column, _value: column.is_not(None),
+}
+
+
+def convert_value(column, raw: str):
+    python_type = column.type.python_type
+    if python_type is bool:
+        if raw.lower() not in ('true', 'false'):
+            raise ValueError(raw)
+        return raw.lower() == 'true'
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(raw)
+    if python_type is UUID:
+        return UUID(raw)
+    return python_type(raw)
+
+
+def parse_filters(model, params, allowed) -> tuple:
+    # ('status__in', 'scheduled,confirmed') -> ('status', 'in', [...])
+    filters = []
+    for key, raw in params:
+        field, _, op = key.partition('__')
+        op = op or 'eq'
+        if field not in allowed:
+            raise HTTPException(
+                status_code=400, detail=f'Unknown filter: {key}'
+            )
+        if op not in OPERATORS or op in NULL_OPERATORS:
+            raise HTTPException(
+                status_code=400, detail=f'Unknown filter operator: {key}'
+            )
+        column = getattr(model, field)
+        if op == 'eq' and raw in NULL_SENTINELS:
+            filters.append((field, NULL_SENTINELS[raw], None))
+            continue
+        try:
+            if op == 'in':
+                value = [
+                    convert_value(column, item) for item in raw.split(',')
+                ]
+            else:
+                value = convert_value(column, raw)
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=400, detail=f'Invalid value for filter: {key}'
+            )
+        filters.append((field, op, value))
+    return tuple(filters)
+
+
+def parse_sort(sort: str | None, allowed, default: tuple) -> tuple:
+    # 'status,-date_hour' -> status ASC, date_hour DESC, id ASC
+    if not sort:
+        return default
+    order = []
+    for item in sort.split(','):
+        item = item.strip()
+        field = item.lstrip('-')
+        if field not in allowed:
+            raise HTTPException(
+                status_code=400, detail=f'Unknown sort field: {field}'
+            )
+        if field not in [name for name, _ in order]:
+            order.append((field, item.startswith('-')))
+    # id desempata e garante um cursor unico
+    if 'id' not in [name for name, _ in order]:
+        order.append(('id', False))
+    return tuple(order)
+
+
+def filter_clause(column, op: str, value):
+    return OPERATORS[op](column, value)
+
+
+def keyset_clause(columns: list, descending: list, values: list):
+    # mesma direcao em todas as colunas: comparacao de tupla (usa o indice
+    # composto); direcoes mistas: (a > x) OR (a = x AND b < y) OR ...
+    if not any(descending):
+        return tuple_(*columns) > tuple_(*values)
+    if all(descending):
+        return tuple_(*columns) < tuple_(*values)
+    clauses = []
+    for i, column in enumerate(columns):
+        step = column < values[i] if descending[i] else column > values[i]
+        clauses.append(
+            and_(*[columns[j] == values[j] for j in range(i)], step)
+        )
+    return or_(*clauses)
@@ -1,48 +1,336 @@
+import base64
+import csv
+import io
+import json
+from datetime import date, datetime
+from functools import lru_cache
+
+from fastapi import HTTPException
+from sqlalchemy import and_, bindparam, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from src.constants import (ACTIVE_APPOINTMENT_STATUSES, PERSON_FIELDS,
+                           STATEMENT_CACHE_SIZE)
+from src.filters import NULL_OPERATORS, filter_clause, keyset_clause
 from src.models import AppointmentModel, PersonModel
 from src.schemas import PatientCreate, ProviderCreate
+from src.shapes import DEFAULT_SHAPE, load_options, serialize
+
+
+async def run_db(db: Session | AsyncSession, fn, *args, **kwargs):
+    # os controllers sao sincronos: com AsyncSession rodam via run_sync
+    # (I/O do asyncpg sem bloquear o loop), com Session rodam numa thread
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
 
 
 def get_by_id(table, id: int, db: Session):
     return db.query(table).filter(table.id == id).first()
 
-def search_resource(table, filters: dict, db: Session):
-    query = db.query(table)
-    for column_name, filter_value in filters.items():
-        column = getattr(table, column_name)
-        if filter_value == "null":
-            query = query.filter(column.is_(None))
-        elif filter_value == "not_null":
-            query = query.filter(column.isnot(None))
-        else:
-            query = query.filter(column == filter_value)
-    
-    return query.first()
 
-def verify_active_appointments(filter_id_column, id: int, db: Session):
-    status_values = ['scheduled', 'confirmed', 'in_progress']
+def insert_person_backed(
+    db: Session, model, resource: PatientCreate | ProviderCreate, detail: str
+):
+    existing = db.execute(
+        select(PersonModel.id, model.id.label('resource_id'))
+        .outerjoin(
+            model,
+            and_(model.person_id == PersonModel.id, model.deleted_at.is_(None)),
+        )
+        .where(PersonModel.document == resource.document)
+        .limit(1)
+    ).first()
+    # se o recurso estiver ativo no sistema, nao cria um novo
+    if existing and existing.resource_id is not None:
+        raise HTTPException(status_code=409, detail=detail)
+
+    if existing:
+        person = (
+            update(PersonModel)
+            .where(PersonModel.id == existing.id)
+            .values(deleted_at=None)
+            .returning(PersonModel.id)
+            .cte('person')
+        )
+    else:
+        person = (
+            insert(PersonModel)
+            .values(**resource.model_dump(include=set(PERSON_FIELDS)))
+            .returning(PersonModel.id)
+            .cte('person')
+        )
 
-    return (
-        db.query(AppointmentModel)
-        .filter(
-            AppointmentModel.status.in_(status_values), filter_id_column == id
+    # pessoa e recurso no mesmo INSERT ... RETURNING, via CTE
+    values = resource.model_dump(exclude=set(PERSON_FIELDS))
+    columns = model.__table__.c
+    # INSERT ... SELECT nao chama os defaults em python (ex: uuid4)
+    for column in columns:
+        if column.default is not None and column.default.is_callable:
+            values.setdefault(column.name, column.default.arg(None))
+    stmt = (
+        insert(model)
+        .from_select(
+            ['person_id', *values],
+            select(
+                person.c.id,
+                *[
+                    literal(value, columns[name].type)
+                    for name, value in values.items()
+                ],
+            ),
         )
-        .first()
+        .returning(model)
     )
+    return db.scalars(stmt).one()
+
+
+def update_person_backed(db: Session, model, resource_id: int, resource):
+    update_data = resource.model_dump(exclude_unset=True)
+    person_values = {
+        field: value
+        for field, value in update_data.items()
+        if field in PERSON_FIELDS
+    }
+    resource_values = {
+        field: value
+        for field, value in update_data.items()
+        if field not in PERSON_FIELDS
+    }
+    is_active = and_(model.id == resource_id, model.deleted_at.is_(None))
+
+    if person_values:
+        db.execute(
+            update(PersonModel)
+            .where(PersonModel.id == model.person_id, is_active)
+            .values(**person_values)
+            .execution_options(synchronize_session=False)
+        )
+
+    if resource_values:
+        stmt = update(model).where(is_active).values(**resource_values)
+        stmt = stmt.returning(model)
+    else:
+        stmt = select(model).where(is_active)
+    return db.scalars(stmt).one_or_none()
 
 
-def create_person(resource: PatientCreate | ProviderCreate, db: Session):
-    db_person = PersonModel(
-        name=resource.name,
-        birth_date=resource.birth_date,
-        document=resource.document,
-        gender=resource.gender,
-        phone_number=resource.phone_number,
-        email=resource.email,
+def soft_delete_person_backed(
+    db: Session, model, resource_id: int, appointment_column, name: str
+):
+    # qualquer consulta ativa bloqueia, por mais antiga que seja; em cada
+    # particao o EXISTS e uma busca nos indices de paciente/profissional
+    has_active_appointments = (
+        select(AppointmentModel.id)
+        .where(
+            appointment_column == model.id,
+            AppointmentModel.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+        )
+        .exists()
+    )
+    deleted = (
+        update(model)
+        .where(
+            model.id == resource_id,
+            model.deleted_at.is_(None),
+            ~has_active_appointments,
+        )
+        .values(deleted_at=func.now())
+        .returning(model.person_id)
+        .cte('deleted')
+    )
+    deleted_person = db.execute(
+        update(PersonModel)
+        .where(PersonModel.id.in_(select(deleted.c.person_id)))
+        .values(deleted_at=func.now())
+        .returning(PersonModel.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted_person is not None:
+        return
+
+    # nada foi removido: so aqui consulta o motivo
+    exists = db.scalar(
+        select(model.id).where(
+            model.id == resource_id, model.deleted_at.is_(None)
+        )
     )
+    if exists is None:
+        raise HTTPException(status_code=404, detail=f'{name} not found')
+    raise HTTPException(
+        status_code=409,
+        detail=f'This {name.lower()} cannot be deleted because they have an in-progress, scheduled, or confirmed appointment.',
+    )
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, date) else v for v in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(columns):
+            raise ValueError
+        return [
+            column.type.python_type.fromisoformat(value)
+            if column.type.python_type in (datetime, date)
+            else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+
+def shaped_select(model, shape: dict, columns: list = ()):
+    # colunas do cursor sempre carregadas, mesmo fora de ?fields=
+    return select(model).options(
+        *load_options(model, shape, [column.key for column in columns])
+    )
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def list_statement(
+    model,
+    filters: tuple,
+    sort: tuple,
+    shape: tuple,
+    keyset: bool,
+    limited: bool,
+):
+    # o statement depende so do formato da consulta (campos, operadores,
+    # ordenacao); os valores entram como bindparams, entao consultas
+    # repetidas reaproveitam o statement e o SQL compilado pelo SQLAlchemy
+    columns = [getattr(model, field) for field, _ in sort]
+    stmt = shaped_select(model, dict(shape), columns)
+    for i, (field, op) in enumerate(filters):
+        column = getattr(model, field)
+        value = bindparam(
+            f'filter_{i}', type_=column.type, expanding=op == 'in'
+        )
+        stmt = stmt.where(filter_clause(column, op, value))
+    if keyset:
+        values = [
+            bindparam(f'cursor_{i}', type_=column.type)
+            for i, column in enumerate(columns)
+        ]
+        stmt = stmt.where(
+            keyset_clause(columns, [desc for _, desc in sort], values)
+        )
+    stmt = stmt.order_by(
+        *[
+            column.desc() if desc else column
+            for column, (_, desc) in zip(columns, sort)
+        ]
+    )
+    return stmt.limit(bindparam('limit')) if limited else stmt
+
+
+def list_select(
+    model,
+    shape: dict,
+    filters: tuple,
+    sort: tuple,
+    after: str | None = None,
+    limited: bool = True,
+):
+    stmt = list_statement(
+        model,
+        tuple((field, op) for field, op, _ in filters),
+        sort,
+        tuple(shape.items()),
+        after is not None,
+        limited,
+    )
+    params = {
+        f'filter_{i}': value
+        for i, (_, op, value) in enumerate(filters)
+        if op not in NULL_OPERATORS
+    }
+    if after is not None:
+        columns = [getattr(model, field) for field, _ in sort]
+        for i, value in enumerate(decode_cursor(after, columns)):
+            params[f'cursor_{i}'] = value
+    return stmt, params
+
+
+def keyset_paginate(
+    db: Session,
+    model,
+    limit: int,
+    after: str | None = None,
+    shape: dict = DEFAULT_SHAPE,
+    filters: tuple = (),
+    sort: tuple = (('id', False),),
+):
+    stmt, params = list_select(model, shape, filters, sort, after=after)
+    rows = db.scalars(stmt, {**params, 'limit': limit + 1}).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            [getattr(rows[-1], field) for field, _ in sort]
+        )
+    return {
+        'items': [serialize(row, shape) for row in rows],
+        'next_cursor': next_cursor,
+    }
+
+
+async def stream_rows(
+    db: Session | AsyncSession,
+    stmt,
+    params: dict | None = None,
+    batch_size: int = 500,
+    scalars: bool = True,
+):
+    # cursor do lado do servidor: as linhas chegam em lotes de batch_size
+    stmt = stmt.execution_options(yield_per=batch_size)
+    if isinstance(db, AsyncSession):
+        stream = db.stream_scalars if scalars else db.stream
+        result = await stream(stmt, params)
+        async for batch in result.partitions():
+            yield batch
+    else:
+        execute = db.scalars if scalars else db.execute
+        result = await run_in_threadpool(execute, stmt, params)
+        batches = result.partitions()
+        while batch := await run_in_threadpool(next, batches, None):
+            yield batch
+
+
+async def ndjson_lines(batches, schema, shape: dict):
+    async for batch in batches:
+        yield ''.join(
+            schema.model_validate(serialize(row, shape)).model_dump_json(
+                exclude_unset=True
+            )
+            + '\n'
+            for row in batch
+        )
+
 
-    db.add(db_person)
-    db.commit()
+def iter_upload_rows(file, file_format: str):
+    # le o arquivo enviado linha a linha, sem carrega-lo inteiro
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # celulas vazias ficam de fora para valerem os defaults
+            yield reader.line_num, {
+                key: value for key, value in row.items() if value != ''
+            }
+        return
 
-    db.refresh(db_person)
-    return db_person
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, None
@@ -1,9 +1,85 @@
-import src.models as models
-from fastapi import FastAPI
-from src.database import engine
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.exc import SQLAlchemyError
+from src.config import settings
+from src.database import (async_engine, async_replica_engines, engine,
+                          prewarm_async_pool, prewarm_pool, replica_engines)
+from src.dependencies import PRIMARY_COOKIE, ReadSessionDep
+from src.helpers import run_db
+from src.observability import MetricsMiddleware, render_metrics
+from src.profiler import ProfilerMiddleware
+from src.replicas import committed_writes
 from src.routers import router
+from src.scheduler import Scheduler, job_status
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_POOL_PREWARM:
+        if settings.DATABASE_ASYNC:
+            await prewarm_async_pool()
+        else:
+            await run_in_threadpool(prewarm_pool)
+    scheduler = None
+    if settings.SCHEDULER_ENABLED:
+        scheduler = Scheduler(engine)
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        await run_in_threadpool(scheduler.stop, settings.SCHEDULER_TICK_SECONDS)
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica_engine in async_replica_engines:
+        await replica_engine.dispose()
+    engine.dispose()
+    for replica_engine in replica_engines:
+        replica_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(router)
+app.add_middleware(MetricsMiddleware)
+if settings.QUERY_PROFILER:
+    app.add_middleware(ProfilerMiddleware)
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics_route(request: Request, db: ReadSessionDep):
+    if settings.METRICS_TOKEN and (
+        request.headers.get('authorization')
+        != f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        raise HTTPException(status_code=401, detail='Invalid metrics token')
+    try:
+        jobs = await run_db(db, job_status)
+    except SQLAlchemyError:
+        # sem banco, as metricas do processo continuam saindo
+        logger.exception('Could not read scheduler jobs for /metrics')
+        jobs = []
+    return PlainTextResponse(
+        render_metrics(jobs), media_type='text/plain; version=0.0.4'
+    )
 
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
-app.include_router(router)
\ No newline at end of file
+@app.middleware('http')
+async def read_your_writes(request: Request, call_next):
+    state = {'wrote': False}
+    token = committed_writes.set(state)
+    try:
+        response = await call_next(request)
+    finally:
+        committed_writes.reset(token)
+    if settings.DATABASE_REPLICA_URLS and state['wrote']:
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            '1',
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+    return response
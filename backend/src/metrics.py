@@ -0,0 +1,108 @@
+import threading
+from bisect import bisect_left
+
+# limites em segundos
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+
+# contagem por combinacao de labels, ex. (metodo, rota, status)
+class Counter:
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.values)
+
+
+class HistogramVec:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        child = self.children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(
+                    labels, Histogram(self.buckets)
+                )
+        child.observe(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            children = dict(self.children)
+        return {
+            labels: child.snapshot() for labels, child in children.items()
+        }
+
+
+# formato texto do Prometheus (exposition format 0.0.4)
+def escape_label(value) -> str:
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{escape_label(v)}"' for name, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def render_samples(
+    name: str, kind: str, help_text: str, labelnames: tuple, samples: dict
+) -> list[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for labels, value in sorted(samples.items()):
+        lines.append(f'{name}{format_labels(labelnames, labels)} {value}')
+    return lines
+
+
+def render_histograms(
+    name: str, help_text: str, labelnames: tuple, snapshots: dict
+) -> list[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, snapshot in sorted(snapshots.items()):
+        for bound, count in snapshot['buckets'].items():
+            le = format_labels(labelnames, labels, f'le="{bound}"')
+            lines.append(f'{name}_bucket{le} {count}')
+        label_text = format_labels(labelnames, labels)
+        lines.append(f'{name}_sum{label_text} {snapshot["sum"]}')
+        lines.append(f'{name}_count{label_text} {snapshot["count"]}')
+    return lines
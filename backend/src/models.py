@@ -1,14 +1,47 @@
 import uuid
 
-from sqlalchemy import Boolean, Column, Date, DateTime
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, Date, DateTime, Float
+from sqlalchemy import ForeignKey, Index, Integer, String, text
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
 
+ACTIVE_STATUSES_CLAUSE = text(
+    "status IN ('scheduled', 'confirmed', 'in_progress')"
+)
+BOOKED_STATUSES_CLAUSE = text("status NOT IN ('cancelled', 'no_show')")
+
 
 class PersonModel(Base):
     __tablename__ = "person"
+    __table_args__ = (
+        Index('ix_person_document', 'document'),
+        # busca aproximada (pg_trgm) e por prefixo, ver migracao 0004
+        Index(
+            'ix_person_name_trgm',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_person_email_trgm',
+            'email',
+            postgresql_using='gin',
+            postgresql_ops={'email': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_person_document_prefix',
+            'document',
+            postgresql_ops={'document': 'text_pattern_ops'},
+        ),
+        Index(
+            'ix_person_phone_number_prefix',
+            'phone_number',
+            postgresql_ops={'phone_number': 'text_pattern_ops'},
+        ),
+    )
+
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     birth_date = Column(Date, nullable=False)
@@ -22,6 +55,14 @@ class PersonModel(Base):
     
 class PatientModel(Base):
     __tablename__ = "patient"
+    __table_args__ = (
+        Index('ix_patient_person_id', 'person_id'),
+        Index(
+            'ix_patient_person_id_not_deleted',
+            'person_id',
+            postgresql_where=text('deleted_at IS NULL'),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     person_id = Column(Integer, ForeignKey('person.id'), nullable=False)
@@ -44,8 +85,20 @@ class PatientModel(Base):
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
+    # relacoes so sao carregadas quando pedidas (?expand=); acesso sem
+    # carregar gera erro em vez de uma query por linha
+    person = relationship(PersonModel, lazy='raise')
+
 class ProviderModel(Base):
     __tablename__ = "provider"
+    __table_args__ = (
+        Index('ix_provider_person_id', 'person_id'),
+        Index(
+            'ix_provider_specialty_not_deleted',
+            'specialty',
+            postgresql_where=text('deleted_at IS NULL AND active'),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     person_id = Column(Integer, ForeignKey('person.id'))
@@ -58,18 +111,39 @@ class ProviderModel(Base):
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
+    person = relationship(PersonModel, lazy='raise')
+
 class AppointmentModel(Base):
     __tablename__ = "appointment"
+    __table_args__ = (
+        Index('ix_appointment_provider_id_date_hour', 'provider_id', 'date_hour'),
+        Index('ix_appointment_patient_id_status', 'patient_id', 'status'),
+        Index(
+            'ix_appointment_provider_id_active',
+            'provider_id',
+            postgresql_where=ACTIVE_STATUSES_CLAUSE,
+        ),
+        Index('ix_appointment_status_date_hour', 'status', 'date_hour'),
+        Index('ix_appointment_date_hour_id', 'date_hour', 'id'),
+        # particionada por mes de date_hour (src.partitions); a exclusao de
+        # sobreposicao por profissional fica em cada particao
+        {'postgresql_partition_by': 'RANGE (date_hour)'},
+    )
 
-    id = Column(Integer, primary_key=True)
+    # a chave de particao precisa estar na pk; id segue unico pela sequence
+    id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey('patient.id'))
     provider_id = Column(Integer, ForeignKey('provider.id'))
-    date_hour = Column(DateTime(timezone=True), nullable=False)
+    date_hour = Column(DateTime(timezone=True), primary_key=True)
+    end_hour = Column(DateTime(timezone=True), nullable=False)
     status = Column(String, nullable=False)
     reason = Column(String, nullable=True)
     notes = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
 
+    patient = relationship(PatientModel, lazy='raise')
+    provider = relationship(ProviderModel, lazy='raise')
+
 class User(Base):
     __tablename__ = "users"
 
@@ -80,4 +154,60 @@ class User(Base):
     admin = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
     deleted_at = Column(DateTime(timezone=True), default=None, nullable=True)
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
+
+class ChangeVersionModel(Base):
+    # contador por tabela, incrementado na mesma transacao de cada escrita;
+    # base dos ETags das listagens
+    __tablename__ = "change_version"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
+class AppointmentDailyStatsModel(Base):
+    # contagem de atendimentos por dia (fuso da clinica), profissional e
+    # status; mantida pelos controllers a cada agendamento/mudanca de status
+    __tablename__ = "appointment_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    provider_id = Column(Integer, ForeignKey('provider.id'), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ScheduledJobModel(Base):
+    # ultima execucao de cada job do agendador (src.scheduler), gravada por
+    # quem obteve o lock do job
+    __tablename__ = "scheduled_job"
+
+    name = Column(String, primary_key=True)
+    last_started_at = Column(DateTime(timezone=True), nullable=True)
+    last_finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_status = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    last_processed = Column(Integer, nullable=False, default=0)
+    last_duration_seconds = Column(Float, nullable=True)
+    last_success_at = Column(DateTime(timezone=True), nullable=True)
+    runs = Column(BigInteger, nullable=False, default=0)
+    # totais desde a criacao do job, lidos pelo /metrics da API
+    failures = Column(BigInteger, nullable=False, default=0)
+    processed = Column(BigInteger, nullable=False, default=0)
+    node = Column(String, nullable=True)
+
+class AppointmentReminderModel(Base):
+    # outbox de lembretes: o agendador enfileira, um consumidor externo envia
+    # e preenche sent_at; sem FK para appointment (pode ser particionada)
+    __tablename__ = "appointment_reminder"
+    __table_args__ = (
+        Index(
+            'ix_appointment_reminder_pending',
+            'remind_at',
+            postgresql_where=text('sent_at IS NULL'),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    appointment_id = Column(Integer, nullable=False, unique=True)
+    remind_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,272 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.cache import user_cache
+from src.database import get_pool_stats
+from src.metrics import (Counter, HistogramVec, render_histograms,
+                         render_samples)
+from src.security import password_hashing_stats
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUESTS = Counter()
+REQUEST_LATENCY = HistogramVec()
+DB_QUERIES = Counter()
+DB_ROWS = Counter()
+DB_SECONDS = Counter()
+QUERIES_PER_REQUEST = HistogramVec(QUERY_COUNT_BUCKETS)
+
+# custo de banco do request atual; o dict e compartilhado com as threads
+# do threadpool e com o greenlet do asyncpg, que veem a mesma referencia
+request_db_cost: ContextVar[dict | None] = ContextVar(
+    'request_db_cost', default=None
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(
+    conn, cursor, statement, parameters, context, executemany
+):
+    # no contexto da execucao, nao na conexao: um statement que falha nao
+    # chega no after_cursor_execute e nao pode deixar lixo na conexao do pool
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(
+    conn, cursor, statement, parameters, context, executemany
+):
+    # -1 quando o driver nao informa (ex. SELECT no asyncpg)
+    add_query_cost(context, max(cursor.rowcount or 0, 0))
+
+
+@event.listens_for(Engine, 'handle_error')
+def record_failed_query(exception_context):
+    # o statement que falhou (ex. violacao de restricao) tambem foi ao banco
+    add_query_cost(exception_context.execution_context, 0)
+
+
+def add_query_cost(context, rows: int):
+    start = getattr(context, 'query_start', None)
+    cost = request_db_cost.get()
+    if start is None or cost is None:
+        return
+    # erro depois do after_cursor_execute (ex. no fetch) nao conta de novo
+    context.query_start = None
+    cost['queries'] += 1
+    cost['seconds'] += time.perf_counter() - start
+    cost['rows'] += rows
+
+
+class MetricsMiddleware:
+    # middleware ASGI puro: mede ate o fim do corpo (inclusive streaming)
+    # e le a rota casada (template, nao o caminho) do scope
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        cost = {'queries': 0, 'rows': 0, 'seconds': 0.0}
+        token = request_db_cost.set(cost)
+        status = {'code': 500}
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_db_cost.reset(token)
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            record_request(
+                scope['method'], route, status['code'], elapsed, cost
+            )
+
+
+def record_request(
+    method: str, route: str, status: int, elapsed: float, cost: dict
+):
+    REQUESTS.inc((method, route, str(status)))
+    REQUEST_LATENCY.observe((method, route), elapsed)
+    DB_QUERIES.inc((route,), cost['queries'])
+    DB_ROWS.inc((route,), cost['rows'])
+    DB_SECONDS.inc((route,), cost['seconds'])
+    QUERIES_PER_REQUEST.observe((route,), cost['queries'])
+
+
+def pool_samples() -> dict:
+    pools = {}
+    stats = get_pool_stats()
+    for key in ('sync', 'async'):
+        if key in stats:
+            pools[(key,)] = stats[key]
+    for key in ('replicas', 'async_replicas'):
+        for replica in stats.get(key, []):
+            pools[(f"{key}:{replica['url']}",)] = replica
+    return pools
+
+
+def render_metrics(jobs: list[dict] = ()) -> str:
+    pools = pool_samples()
+    cache = user_cache.stats()
+    hashing = password_hashing_stats()
+    lines = [
+        *render_samples(
+            'http_requests_total',
+            'counter',
+            'HTTP requests by method, route template and status.',
+            ('method', 'route', 'status'),
+            REQUESTS.snapshot(),
+        ),
+        *render_histograms(
+            'http_request_duration_seconds',
+            'Request latency, including the streamed body.',
+            ('method', 'route'),
+            REQUEST_LATENCY.snapshot(),
+        ),
+        *render_samples(
+            'db_queries_total',
+            'counter',
+            'SQL statements executed, by route.',
+            ('route',),
+            DB_QUERIES.snapshot(),
+        ),
+        *render_samples(
+            'db_rows_total',
+            'counter',
+            'Rows reported by the driver (rowcount), by route.',
+            ('route',),
+            DB_ROWS.snapshot(),
+        ),
+        *render_samples(
+            'db_query_seconds_total',
+            'counter',
+            'Time spent executing SQL, by route.',
+            ('route',),
+            DB_SECONDS.snapshot(),
+        ),
+        *render_histograms(
+            'db_queries_per_request',
+            'SQL statements per request.',
+            ('route',),
+            QUERIES_PER_REQUEST.snapshot(),
+        ),
+    ]
+    for name, key, help_text in [
+        ('db_pool_size', 'size', 'Configured pool size.'),
+        ('db_pool_checked_out', 'checked_out', 'Connections in use.'),
+        ('db_pool_checked_in', 'checked_in', 'Idle pooled connections.'),
+        ('db_pool_overflow', 'overflow', 'Overflow connections in use.'),
+    ]:
+        lines += render_samples(
+            name,
+            'gauge',
+            help_text,
+            ('pool',),
+            {labels: pool[key] for labels, pool in pools.items()},
+        )
+    # espera e timeouts sao acumulados por tipo de pool (sync/async)
+    primary = {
+        labels: pool for labels, pool in pools.items()
+        if labels[0] in ('sync', 'async')
+    }
+    lines += render_samples(
+        'db_pool_timeouts_total',
+        'counter',
+        'Checkouts that hit pool_timeout.',
+        ('pool',),
+        {labels: pool['timeouts'] for labels, pool in primary.items()},
+    )
+    lines += render_histograms(
+        'db_pool_wait_seconds',
+        'Time waiting for a pool checkout.',
+        ('pool',),
+        {labels: pool['wait_time'] for labels, pool in primary.items()},
+    )
+    lines += render_samples(
+        'user_cache_requests_total',
+        'counter',
+        'Authenticated-user cache lookups.',
+        ('result',),
+        {('hit',): cache['hits'], ('miss',): cache['misses']},
+    )
+    lines += render_samples(
+        'user_cache_size', 'gauge', 'Cached users.', (), {(): cache['size']}
+    )
+    lines += render_samples(
+        'password_hash_pending',
+        'gauge',
+        'Hash/verify calls queued or running.',
+        (),
+        {(): hashing['pending']},
+    )
+    lines += render_samples(
+        'password_hash_rejected_total',
+        'counter',
+        'Hash/verify calls rejected with 429.',
+        (),
+        {(): hashing['rejected']},
+    )
+    for operation in ('hash', 'verify'):
+        lines += render_histograms(
+            f'password_{operation}_seconds',
+            f'bcrypt {operation} duration.',
+            (),
+            {(): hashing[operation]},
+        )
+    # jobs lidos de scheduled_job (job_status): executados no servico
+    # scheduler ou na API, com qualquer numero de replicas
+    lines += render_samples(
+        'scheduler_job_runs_total',
+        'counter',
+        'Scheduler job runs by outcome (success, error).',
+        ('job', 'outcome'),
+        {
+            (job['name'], outcome): value
+            for job in jobs
+            for outcome, value in (
+                ('success', job['runs'] - job['failures']),
+                ('error', job['failures']),
+            )
+        },
+    )
+    lines += render_samples(
+        'scheduler_job_processed_total',
+        'counter',
+        'Rows processed by scheduler jobs.',
+        ('job',),
+        {(job['name'],): job['processed'] for job in jobs},
+    )
+    lines += render_samples(
+        'scheduler_job_last_duration_seconds',
+        'gauge',
+        'Duration of the last scheduler job run.',
+        ('job',),
+        {
+            (job['name'],): job['last_duration_seconds']
+            for job in jobs
+            if job['last_duration_seconds'] is not None
+        },
+    )
+    lines += render_samples(
+        'scheduler_job_last_success_timestamp_seconds',
+        'gauge',
+        'Unix time of the last successful run.',
+        ('job',),
+        {
+            (job['name'],): job['last_success_at'].timestamp()
+            for job in jobs
+            if job['last_success_at'] is not None
+        },
+    )
+    return '\n'.join(lines) + '\n'
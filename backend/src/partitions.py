@@ -0,0 +1,239 @@
+import argparse
+import gzip
+import os
+import re
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from src.config import settings
+from src.constants import PARTITION_MONTHS_AHEAD
+from src.models import BOOKED_STATUSES_CLAUSE
+from src.versions import bump_versions
+
+PARENT = 'appointment'
+PARTITION_NAME = re.compile(r'^appointment_p(\d{4})_(\d{2})$')
+# a exclusao de sobreposicao nao vale em tabela particionada (teria de
+# comparar date_hour com "="), entao cada particao recebe a sua; o CHECK de
+# end_hour impede consultas atravessando o fim do mes, que escapariam dela
+OVERLAP_CONSTRAINT = (
+    'EXCLUDE USING gist (provider_id WITH =, '
+    'tstzrange(date_hour, end_hour) WITH &&) '
+    f'WHERE ({BOOKED_STATUSES_CLAUSE.text})'
+)
+# particoes anexadas e as ja destacadas (inhdetachpending nulo)
+PARTITIONS_SQL = text(
+    """
+    SELECT c.relname, i.inhdetachpending FROM pg_class c
+    LEFT JOIN pg_inherits i
+      ON i.inhrelid = c.oid AND i.inhparent = CAST(:parent AS regclass)
+    WHERE c.relkind = 'r' AND c.relname LIKE :prefix
+      AND c.relnamespace = CAST(current_schema() AS regnamespace)
+    ORDER BY c.relname
+    """
+)
+
+
+def clinic_today() -> date:
+    return datetime.now(ZoneInfo(settings.CLINIC_TIMEZONE)).date()
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'{PARENT}_p{month:%Y_%m}'
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    # meses no fuso da clinica, como os dias de appointment_daily_stats
+    zone = ZoneInfo(settings.CLINIC_TIMEZONE)
+    return (
+        datetime.combine(month.replace(day=1), time.min, zone),
+        datetime.combine(add_months(month, 1), time.min, zone),
+    )
+
+
+def list_partitions(connection) -> list[tuple[str, date, bool | None]]:
+    partitions = []
+    for name, pending in connection.execute(
+        PARTITIONS_SQL, {'parent': PARENT, 'prefix': f'{PARENT}\\_p%'}
+    ):
+        match = PARTITION_NAME.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            partitions.append((name, date(year, month, 1), pending))
+    return partitions
+
+
+def create_partition(connection, month: date) -> bool:
+    name = partition_name(month)
+    exists = connection.scalar(
+        text('SELECT to_regclass(:name)'), {'name': name}
+    )
+    if exists is not None:
+        return False
+    lower, upper = month_bounds(month)
+    # criada solta e anexada depois: ATTACH PARTITION trava a tabela pai so
+    # em SHARE UPDATE EXCLUSIVE, sem bloquear leituras e escritas
+    connection.execute(
+        text(f'CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)')
+    )
+    connection.execute(
+        text(
+            f'ALTER TABLE {name} '
+            f'ADD CONSTRAINT {name}_provider_no_overlap {OVERLAP_CONSTRAINT}, '
+            f'ADD CONSTRAINT {name}_within_month '
+            f"CHECK (date_hour >= '{lower.isoformat()}' "
+            f"AND date_hour < '{upper.isoformat()}' "
+            f"AND end_hour <= '{upper.isoformat()}')"
+        )
+    )
+    connection.execute(
+        text(
+            f'ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES '
+            f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    )
+    return True
+
+
+def ensure_partitions(connection, start: date, end: date) -> list[str]:
+    # cria as particoes que faltam de start a end (inclusive)
+    created = []
+    month = start.replace(day=1)
+    while month <= end:
+        if create_partition(connection, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partition(connection, name: str, pending: bool):
+    # CONCURRENTLY espera as consultas em andamento em vez de travar a
+    # tabela pai; se for interrompido a particao fica pendente e o FINALIZE
+    # conclui. Nao roda dentro de transacao: a conexao precisa de AUTOCOMMIT
+    mode = 'FINALIZE' if pending else 'CONCURRENTLY'
+    connection.execute(
+        text(f'ALTER TABLE {PARENT} DETACH PARTITION {name} {mode}')
+    )
+
+
+def archive_partition(engine, name: str, directory: str) -> str:
+    # grava em .partial e so renomeia depois do fsync: um arquivo com o
+    # nome final esta sempre completo
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.csv.gz')
+    partial = f'{path}.partial'
+    raw = engine.raw_connection()
+    try:
+        with open(partial, 'wb') as file:
+            with gzip.GzipFile(fileobj=file, mode='wb') as archive:
+                raw.cursor().copy_expert(
+                    f'COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)',
+                    archive,
+                )
+            file.flush()
+            os.fsync(file.fileno())
+        raw.rollback()
+    finally:
+        raw.close()
+    os.replace(partial, path)
+    return path
+
+
+def apply_retention(
+    engine,
+    keep_months: int,
+    archive_dir: str | None = None,
+    today: date | None = None,
+) -> list[str]:
+    # particoes com mes inteiro antes da janela saem da tabela; com
+    # archive_dir viram CSV comprimido e sao removidas, sem ele ficam como
+    # tabelas soltas (arquivadas quando archive_dir for definido).
+    # appointment_daily_stats mantem o historico agregado
+    cutoff = add_months((today or clinic_today()).replace(day=1), -keep_months)
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT')
+        retired = []
+        for name, month, pending in list_partitions(connection):
+            if month >= cutoff or (pending is None and not archive_dir):
+                continue
+            if pending is not None:
+                detach_partition(connection, name, pending)
+            if archive_dir:
+                archive_partition(engine, name, archive_dir)
+                connection.execute(text(f'DROP TABLE {name}'))
+            retired.append(name)
+        if retired:
+            bump_versions(connection, 'appointment')
+    return retired
+
+
+def maintain_partitions(engine, today: date | None = None) -> dict:
+    today = today or clinic_today()
+    with engine.begin() as connection:
+        # trava curta: se houver DDL ou VACUUM longo na tabela, tenta de novo
+        # na proxima execucao em vez de enfileirar as escritas atras dela
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        created = ensure_partitions(
+            connection, today, add_months(today, PARTITION_MONTHS_AHEAD)
+        )
+    retired = []
+    if settings.APPOINTMENT_RETENTION_MONTHS is not None:
+        retired = apply_retention(
+            engine,
+            settings.APPOINTMENT_RETENTION_MONTHS,
+            settings.APPOINTMENT_ARCHIVE_DIR,
+            today,
+        )
+    return {'created': created, 'retired': retired}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.partitions')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='lista as particoes de appointment')
+    ensure = commands.add_parser(
+        'ensure', help='cria as particoes dos proximos meses'
+    )
+    ensure.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD)
+    ensure.add_argument('--start', type=date.fromisoformat)
+    retain = commands.add_parser(
+        'retain', help='destaca (e arquiva) as particoes antigas'
+    )
+    retain.add_argument(
+        '--keep-months', type=int, default=settings.APPOINTMENT_RETENTION_MONTHS
+    )
+    retain.add_argument('--archive-dir', default=settings.APPOINTMENT_ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+
+    from src.database import engine
+
+    if args.command == 'list':
+        with engine.connect() as connection:
+            for name, month, pending in list_partitions(connection):
+                lower, upper = month_bounds(month)
+                state = {None: ' (detached)', True: ' (detach pending)'}
+                print(
+                    f'{name}: {lower.isoformat()} - {upper.isoformat()}'
+                    f'{state.get(pending, "")}'
+                )
+    elif args.command == 'ensure':
+        start = args.start or clinic_today()
+        with engine.begin() as connection:
+            created = ensure_partitions(
+                connection, start, add_months(start, args.months_ahead)
+            )
+        print(f'{len(created)} partitions created')
+    else:
+        if args.keep_months is None:
+            parser.error('--keep-months (or APPOINTMENT_RETENTION_MONTHS) is required')
+        retired = apply_retention(engine, args.keep_months, args.archive_dir)
+        print(f'{len(retired)} partitions retired')
+
+
+if __name__ == '__main__':
+    main()
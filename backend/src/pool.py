@@ -0,0 +1,40 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from src.metrics import Counter, Histogram
+
+# as estatisticas ficam fora das instancias porque engine.dispose()
+# recria o pool
+WAIT_TIME = {'sync': Histogram(), 'async': Histogram()}
+# incrementado por varias threads de request ao mesmo tempo
+TIMEOUTS = Counter()
+
+
+class InstrumentedQueuePool(QueuePool):
+    stats_key = 'sync'
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            TIMEOUTS.inc((self.stats_key,))
+            raise
+        finally:
+            WAIT_TIME[self.stats_key].observe(time.perf_counter() - start)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    stats_key = 'async'
+
+
+def pool_stats(pool: InstrumentedQueuePool) -> dict:
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'timeouts': TIMEOUTS.snapshot().get((pool.stats_key,), 0),
+        'wait_time': WAIT_TIME[pool.stats_key].snapshot(),
+    }
@@ -0,0 +1,188 @@
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# listas de parametros ((%(p_1)s, %(p_2)s) / ($1, $2)) viram um unico marcador
+# para que IN com tamanhos diferentes tenham o mesmo formato
+PARAM = r'(?:%\(\w+\)s|\$\d+(?:::\w+)?|\?)'
+PARAM_LIST = re.compile(rf'\(\s*{PARAM}(?:\s*,\s*{PARAM})*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+    return PARAM_LIST.sub('(?)', WHITESPACE.sub(' ', statement).strip())
+
+
+def call_site() -> str:
+    # primeiro frame do nosso codigo fora do proprio profiler
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if '/src/' in frame.filename and not frame.filename.endswith(
+            ('profiler.py', 'observability.py')
+        ):
+            return f'{frame.filename.rsplit("/src/", 1)[1]}:{frame.lineno}'
+    return 'unknown'
+
+
+class QueryProfile:
+    def __init__(self):
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, elapsed: float, site: str):
+        with self._lock:
+            self.queries.append((statement_shape(statement), elapsed, site))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(elapsed for _, elapsed, _ in self.queries)
+
+    def repeated(self, threshold: int | None = None) -> list[tuple]:
+        # (formato, vezes, local da primeira chamada): suspeitas de N+1
+        threshold = threshold or settings.QUERY_PROFILER_REPEAT_THRESHOLD
+        counts = Counter(shape for shape, _, _ in self.queries)
+        sites = {}
+        for shape, _, site in self.queries:
+            sites.setdefault(shape, site)
+        return [
+            (shape, times, sites[shape])
+            for shape, times in counts.most_common()
+            if times >= threshold
+        ]
+
+    def report(self) -> str:
+        lines = [f'{self.count} queries, {self.seconds * 1000:.1f}ms']
+        for shape, times, site in self.repeated():
+            lines.append(f'  repeated {times}x at {site}: {shape[:200]}')
+        for shape, elapsed, site in self.queries:
+            lines.append(f'  {elapsed * 1000:7.2f}ms {site}: {shape[:200]}')
+        return '\n'.join(lines)
+
+
+current_profile: ContextVar[QueryProfile | None] = ContextVar(
+    'current_profile', default=None
+)
+# orcamentos ativos (query_budget) valem para qualquer thread/loop, ja que o
+# TestClient executa o app fora do contexto do teste
+active_budgets: list[QueryProfile] = []
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_profile_timer(
+    conn, cursor, statement, parameters, context, executemany
+):
+    if context is not None and (
+        current_profile.get() is not None or active_budgets
+    ):
+        context.profile_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_profiled_query(
+    conn, cursor, statement, parameters, context, executemany
+):
+    add_profiled_query(context, statement)
+
+
+@event.listens_for(Engine, 'handle_error')
+def record_failed_query(exception_context):
+    # statements que falham tambem sao idas ao banco
+    if exception_context.statement is not None:
+        add_profiled_query(
+            exception_context.execution_context, exception_context.statement
+        )
+
+
+def add_profiled_query(context, statement: str):
+    start = getattr(context, 'profile_start', None)
+    if start is None:
+        return
+    # um mesmo contexto pode executar de novo (executemany em lotes)
+    context.profile_start = None
+    elapsed = time.perf_counter() - start
+    site = call_site()
+    profiles = [current_profile.get(), *active_budgets]
+    for profile in profiles:
+        if profile is not None:
+            profile.add(statement, elapsed, site)
+
+
+class ProfilerMiddleware:
+    # so para desenvolvimento (QUERY_PROFILER=true): cabecalhos com o custo
+    # de banco e log com cada statement; em respostas em streaming os
+    # cabecalhos saem antes do corpo, o log cobre o request inteiro
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_headers(message):
+            if message['type'] == 'http.response.start':
+                elapsed_ms = profile.seconds * 1000
+                message.setdefault('headers', [])
+                message['headers'] = [
+                    *message['headers'],
+                    (b'x-db-query-count', str(profile.count).encode()),
+                    (b'x-db-query-time-ms', f'{elapsed_ms:.1f}'.encode()),
+                    (
+                        b'x-db-repeated-queries',
+                        str(len(profile.repeated())).encode(),
+                    ),
+                    (b'server-timing', f'db;dur={elapsed_ms:.1f}'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_profile.reset(token)
+            level = logging.WARNING if profile.repeated() else logging.INFO
+            logger.log(
+                level,
+                '%s %s: %s',
+                scope['method'],
+                scope['path'],
+                profile.report(),
+            )
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeated: int | None = None):
+    # nos testes, pela fixture de mesmo nome (tests/conftest.py):
+    #     with query_budget(3):
+    #         client.get('/patients/?expand=person')
+    profile = QueryProfile()
+    active_budgets.append(profile)
+    try:
+        yield profile
+    finally:
+        active_budgets.remove(profile)
+    if profile.count > max_queries:
+        raise AssertionError(
+            f'Query budget exceeded ({profile.count} > {max_queries}):\n'
+            + profile.report()
+        )
+    if max_repeated is not None and len(profile.repeated()) > max_repeated:
+        raise AssertionError(
+            'Repeated query shapes (possible N+1):\n' + profile.report()
+        )
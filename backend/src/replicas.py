@@ -0,0 +1,95 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import Delete, Insert, Update, event, exc
+from sqlalchemy.orm import Session
+from src.config import settings
+
+# preenchido pelo middleware de cada request; marcado quando uma transacao
+# e confirmada, para o cliente ler as proprias escritas no primario
+committed_writes: ContextVar[dict | None] = ContextVar(
+    'committed_writes', default=None
+)
+
+
+@event.listens_for(Session, 'after_commit')
+def mark_committed_write(session):
+    state = committed_writes.get()
+    if state is not None:
+        state['wrote'] = True
+
+
+class ReplicaSet:
+    # round-robin entre as replicas saudaveis; uma replica que falha ao
+    # conectar (ou cai no meio de uma consulta) fica de fora por
+    # REPLICA_RETRY_SECONDS
+    def __init__(self, engines: list):
+        self.engines = engines
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.down_until = {}
+        for engine in engines:
+            event.listen(engine, 'handle_error', self.on_error)
+
+    def on_error(self, context):
+        if context.is_disconnect and context.engine is not None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, engine):
+        with self.lock:
+            self.down_until[engine] = (
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            )
+
+    def candidates(self) -> list:
+        if not self.engines:
+            return []
+        start = next(self.counter) % len(self.engines)
+        ordered = self.engines[start:] + self.engines[:start]
+        now = time.monotonic()
+        with self.lock:
+            return [e for e in ordered if self.down_until.get(e, 0) <= now]
+
+    def connect(self):
+        for engine in self.candidates():
+            try:
+                return engine.connect()
+            except (exc.DBAPIError, OSError):
+                # asyncpg sobe OSError cru quando o host nao responde
+                self.mark_down(engine)
+        return None
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                'url': engine.url.render_as_string(hide_password=True),
+                'healthy': self.down_until.get(engine, 0) <= now,
+            }
+            for engine in self.engines
+        ]
+
+
+class RoutingSession(Session):
+    # sessao das rotas de leitura: consultas vao para uma replica (a mesma
+    # durante toda a sessao); flush e INSERT/UPDATE/DELETE vao para o primario.
+    # Sem replica disponivel tudo cai no primario.
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return super().get_bind(mapper, clause=clause, **kw)
+        connection = self.info.get('replica_connection')
+        if connection is None:
+            replicas = self.info.get('replicas')
+            connection = replicas.connect() if replicas else None
+            if connection is None:
+                return super().get_bind(mapper, clause=clause, **kw)
+            self.info['replica_connection'] = connection
+        return connection
+
+    def close(self):
+        super().close()
+        connection = self.info.pop('replica_connection', None)
+        if connection is not None:
+            connection.close()
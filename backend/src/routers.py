@@ -1,45 +1,127 @@
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi import (APIRouter, Depends, HTTPException, Query, UploadFile,
+                     status)
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
+from src.cache import user_cache
 from src.config import settings
+from src.constants import (APPOINTMENT_DURATION_MINUTES, DEFAULT_PAGE_SIZE,
+                           MAX_APPOINTMENT_MINUTES, MAX_PAGE_SIZE,
+                           SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT,
+                           SEARCH_MIN_LENGTH, SLOT_MINUTES)
 from src.controllers import (
-    authenticate,
+    authenticate_async,
     create_appointment,
     create_patient,
     create_provider,
     delete_patient,
     delete_provider,
+    export_appointments,
+    export_patients,
+    get_appointment,
+    get_appointment_stats,
     get_appointments,
+    get_availability,
+    get_patient,
     get_patients,
+    get_provider,
     get_providers,
+    import_patients,
+    import_providers,
+    search_people,
+    stream_appointments,
+    stream_patients,
+    stream_providers,
+    transition_appointments,
     update_appointment,
     update_patient,
     update_provider,
     create_user,
 )
-from src.dependencies import CurrentUser, SessionDep
+from src.database import get_pool_stats
+from src.dependencies import (AppointmentQuery, AppointmentShape,
+                              AppointmentVersion, CurrentUser, PatientQuery,
+                              PatientShape, PatientVersion, ProviderQuery,
+                              ProviderShape, ProviderVersion, ReadSessionDep,
+                              SessionDep)
+from src.exports import MEDIA_TYPES, export_chunks
+from src.helpers import iter_upload_rows, ndjson_lines, run_db
+from src.scheduler import job_status
 from src.schemas import (
     AppointmentCreate,
+    AppointmentDailyStats,
+    AppointmentRead,
     AppointmentResponse,
+    AppointmentStatus,
+    AppointmentStatusTransition,
+    AppointmentStatusTransitionResult,
     AppointmentUpdate,
+    ExportFormat,
+    ImportFormat,
+    ImportResult,
+    InsuranceProvider,
+    Page,
     PatientCreate,
+    PatientRead,
     PatientResponse,
     PatientUpdate,
+    PersonKind,
+    PersonSearchResult,
+    ProviderAvailability,
     ProviderCreate,
+    ProviderRead,
     ProviderResponse,
+    ProviderSpeciality,
     ProviderUpdate,
     Token,
     User,
     UserCreate,
+    WorkShift,
 )
-from src.security import create_access_token
+from src.security import (create_access_token, get_password_hash_async,
+                          password_hashing_stats)
 
 router = APIRouter()
 
+LimitQuery = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
+
+def upload_format(file: UploadFile, file_format: ImportFormat | None) -> str:
+    if file_format is not None:
+        return file_format.value
+    if file.filename and file.filename.lower().endswith('.csv'):
+        return ImportFormat.csv.value
+    return ImportFormat.ndjson.value
+
+
+def export_response(
+    export, export_format: ExportFormat, filename: str
+):
+    columns, batches = export
+    return StreamingResponse(
+        export_chunks(batches, columns, export_format.value),
+        media_type=MEDIA_TYPES[export_format.value],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{filename}.{export_format.value}"'
+            )
+        },
+    )
+
+
+def ndjson_response(
+    rows, schema, shape: dict, headers: dict | None = None
+):
+    return StreamingResponse(
+        ndjson_lines(rows, schema, shape),
+        media_type='application/x-ndjson',
+        headers=headers,
+    )
+
+
 @router.get('/')
 def intro_message():
     return "Welcome to 'a clinica' API!"
@@ -50,8 +132,8 @@ async def login(
     session: SessionDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
-    user = authenticate(
-        session=session,
+    user = await authenticate_async(
+        session,
         username=form_data.username,
         password=form_data.password,
     )
@@ -74,7 +156,10 @@ async def login(
 
 @router.post('/singup/', response_model=User)
 async def create_user_route(session: SessionDep, user: UserCreate):
-    return create_user(session, user)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_db(
+        session, create_user, user, hashed_password=hashed_password
+    )
 
 
 # Pacientes
@@ -82,12 +167,65 @@ async def create_user_route(session: SessionDep, user: UserCreate):
 async def create_patient_route(
     patient: PatientCreate, db: SessionDep, _current_user: CurrentUser
 ):
-    return create_patient(db=db, patient_info=patient)
+    return await run_db(db, create_patient, patient_info=patient)
+
+
+@router.post('/patients/import/', response_model=ImportResult)
+async def import_patients_route(
+    file: UploadFile,
+    db: SessionDep,
+    _current_user: CurrentUser,
+    file_format: Annotated[ImportFormat | None, Query(alias='format')] = None,
+):
+    rows = iter_upload_rows(file.file, upload_format(file, file_format))
+    return await run_db(db, import_patients, rows)
+
+
+@router.get(
+    '/patients/',
+    response_model=Page[PatientRead],
+    response_model_exclude_unset=True,
+)
+async def read_all_patients_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: PatientShape,
+    query: PatientQuery,
+    version: PatientVersion,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    stream: bool = False,
+):
+    if stream:
+        return ndjson_response(
+            stream_patients(db, after=after, shape=shape, **query),
+            PatientRead,
+            shape,
+            headers=version,
+        )
+    return await run_db(
+        db, get_patients, limit=limit, after=after, shape=shape, **query
+    )
 
 
-@router.get('/patients/', response_model=list[PatientResponse])
-async def read_all_patients_route(db: SessionDep):
-    return get_patients(db)
+@router.get(
+    '/patients/{patient_id}',
+    response_model=PatientRead,
+    response_model_exclude_unset=True,
+)
+async def read_patient_route(
+    patient_id: int,
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: PatientShape,
+    _version: PatientVersion,
+):
+    db_patient = await run_db(
+        db, get_patient, patient_id=patient_id, shape=shape
+    )
+    if db_patient is None:
+        raise HTTPException(status_code=404, detail='Patient not found')
+    return db_patient
 
 
 @router.put('/patients/{patient_id}', response_model=PatientResponse)
@@ -97,7 +235,9 @@ async def update_patient_route(
     db: SessionDep,
     _current_user: CurrentUser,
 ):
-    db_patient = update_patient(db, patient_id=patient_id, patient=patient)
+    db_patient = await run_db(
+        db, update_patient, patient_id=patient_id, patient=patient
+    )
     if db_patient is None:
         raise HTTPException(status_code=404, detail='Patient not found')
     return db_patient
@@ -109,7 +249,7 @@ async def update_patient_route(
 async def delete_patient_route(
     patient_id: int, db: SessionDep, _current_user: CurrentUser
 ):
-    delete_patient(db, patient_id)
+    await run_db(db, delete_patient, patient_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -118,12 +258,65 @@ async def delete_patient_route(
 async def create_provider_route(
     provider: ProviderCreate, db: SessionDep, _current_user: CurrentUser
 ):
-    return create_provider(db=db, provider_info=provider)
+    return await run_db(db, create_provider, provider_info=provider)
+
+
+@router.post('/providers/import/', response_model=ImportResult)
+async def import_providers_route(
+    file: UploadFile,
+    db: SessionDep,
+    _current_user: CurrentUser,
+    file_format: Annotated[ImportFormat | None, Query(alias='format')] = None,
+):
+    rows = iter_upload_rows(file.file, upload_format(file, file_format))
+    return await run_db(db, import_providers, rows)
+
+
+@router.get(
+    '/providers/',
+    response_model=Page[ProviderRead],
+    response_model_exclude_unset=True,
+)
+async def read_all_providers_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: ProviderShape,
+    query: ProviderQuery,
+    version: ProviderVersion,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    stream: bool = False,
+):
+    if stream:
+        return ndjson_response(
+            stream_providers(db, after=after, shape=shape, **query),
+            ProviderRead,
+            shape,
+            headers=version,
+        )
+    return await run_db(
+        db, get_providers, limit=limit, after=after, shape=shape, **query
+    )
 
 
-@router.get('/providers/', response_model=list[ProviderResponse])
-async def read_all_providers_route(db: SessionDep, _current_user: CurrentUser):
-    return get_providers(db)
+@router.get(
+    '/providers/{provider_id}',
+    response_model=ProviderRead,
+    response_model_exclude_unset=True,
+)
+async def read_provider_route(
+    provider_id: int,
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: ProviderShape,
+    _version: ProviderVersion,
+):
+    db_provider = await run_db(
+        db, get_provider, provider_id=provider_id, shape=shape
+    )
+    if db_provider is None:
+        raise HTTPException(status_code=404, detail='Provider not found')
+    return db_provider
 
 
 @router.put('/providers/{provider_id}', response_model=ProviderResponse)
@@ -133,8 +326,8 @@ async def update_provider_route(
     db: SessionDep,
     _current_user: CurrentUser,
 ):
-    db_provider = update_provider(
-        db, provider_id=provider_id, provider=provider
+    db_provider = await run_db(
+        db, update_provider, provider_id=provider_id, provider=provider
     )
     if db_provider is None:
         raise HTTPException(status_code=404, detail='Provider not found')
@@ -147,7 +340,7 @@ async def update_provider_route(
 async def delete_provider_route(
     provider_id: int, db: SessionDep, _current_user: CurrentUser
 ):
-    delete_provider(db, provider_id)
+    await run_db(db, delete_provider, provider_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -156,14 +349,61 @@ async def delete_provider_route(
 async def create_appointment_route(
     appointment: AppointmentCreate, db: SessionDep, _current_user: CurrentUser
 ):
-    return create_appointment(db=db, appointment_info=appointment)
+    return await run_db(
+        db, create_appointment, appointment_info=appointment
+    )
 
 
-@router.get('/appointments/', response_model=list[AppointmentResponse])
+@router.get(
+    '/appointments/',
+    response_model=Page[AppointmentRead],
+    response_model_exclude_unset=True,
+)
 async def read_all_appointments_route(
-    db: SessionDep, _current_user: CurrentUser
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: AppointmentShape,
+    query: AppointmentQuery,
+    version: AppointmentVersion,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    stream: bool = False,
+):
+    if stream:
+        return ndjson_response(
+            stream_appointments(db, after=after, shape=shape, **query),
+            AppointmentRead,
+            shape,
+            headers=version,
+        )
+    return await run_db(
+        db,
+        get_appointments,
+        limit=limit,
+        after=after,
+        shape=shape,
+        **query,
+    )
+
+
+@router.get(
+    '/appointments/{appointment_id}',
+    response_model=AppointmentRead,
+    response_model_exclude_unset=True,
+)
+async def read_appointment_route(
+    appointment_id: int,
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    shape: AppointmentShape,
+    _version: AppointmentVersion,
 ):
-    return get_appointments(db)
+    db_appointment = await run_db(
+        db, get_appointment, appointment_id=appointment_id, shape=shape
+    )
+    if db_appointment is None:
+        raise HTTPException(status_code=404, detail='Appointment not found')
+    return db_appointment
 
 
 @router.put(
@@ -175,9 +415,161 @@ async def update_appointment_route(
     db: SessionDep,
     _current_user: CurrentUser,
 ):
-    db_appointment = update_appointment(
-        db, appointment_id=appointment_id, appointment=appointment
+    db_appointment = await run_db(
+        db,
+        update_appointment,
+        appointment_id=appointment_id,
+        appointment=appointment,
     )
     if db_appointment is None:
         raise HTTPException(status_code=404, detail='Appointment not found')
     return db_appointment
+
+
+@router.post(
+    '/appointments/status/', response_model=AppointmentStatusTransitionResult
+)
+async def transition_appointments_route(
+    transition: AppointmentStatusTransition,
+    db: SessionDep,
+    _current_user: CurrentUser,
+):
+    return await run_db(db, transition_appointments, transition=transition)
+
+
+# Agenda
+@router.get('/availability/', response_model=list[ProviderAvailability])
+async def read_availability_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    start: datetime,
+    end: datetime,
+    specialty: ProviderSpeciality | None = None,
+    work_shift: WorkShift | None = None,
+    provider_id: Annotated[list[int] | None, Query()] = None,
+    duration: Annotated[
+        int, Query(ge=SLOT_MINUTES, le=MAX_APPOINTMENT_MINUTES)
+    ] = APPOINTMENT_DURATION_MINUTES,
+):
+    return await run_db(
+        db,
+        get_availability,
+        start=start,
+        end=end,
+        duration=duration,
+        specialty=specialty,
+        work_shift=work_shift,
+        provider_ids=provider_id,
+    )
+
+
+# Painel
+@router.get(
+    '/dashboard/appointments/', response_model=list[AppointmentDailyStats]
+)
+async def appointment_stats_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    start: date,
+    end: date,
+    provider_id: Annotated[list[int] | None, Query()] = None,
+):
+    return await run_db(
+        db,
+        get_appointment_stats,
+        start=start,
+        end=end,
+        provider_ids=provider_id,
+    )
+
+
+# Exportacao
+@router.get('/exports/appointments/')
+async def export_appointments_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    start: date,
+    end: date,
+    provider_id: Annotated[list[int] | None, Query()] = None,
+    appointment_status: Annotated[
+        list[AppointmentStatus] | None, Query(alias='status')
+    ] = None,
+    insurance_provider: Annotated[
+        list[InsuranceProvider] | None, Query()
+    ] = None,
+    export_format: Annotated[
+        ExportFormat, Query(alias='format')
+    ] = ExportFormat.csv,
+):
+    export = export_appointments(
+        db,
+        start=start,
+        end=end,
+        provider_ids=provider_id,
+        statuses=[item.value for item in appointment_status or ()],
+        insurance_providers=[item.value for item in insurance_provider or ()],
+    )
+    return export_response(
+        export, export_format, f'appointments-{start}-{end}'
+    )
+
+
+@router.get('/exports/patients/')
+async def export_patients_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    insurance_provider: Annotated[
+        list[InsuranceProvider] | None, Query()
+    ] = None,
+    export_format: Annotated[
+        ExportFormat, Query(alias='format')
+    ] = ExportFormat.csv,
+):
+    export = export_patients(
+        db,
+        insurance_providers=[item.value for item in insurance_provider or ()],
+    )
+    return export_response(export, export_format, 'patients')
+
+
+# Busca
+@router.get('/search/people/', response_model=list[PersonSearchResult])
+async def search_people_route(
+    db: ReadSessionDep,
+    _current_user: CurrentUser,
+    q: Annotated[str, Query(min_length=SEARCH_MIN_LENGTH)],
+    kind: PersonKind | None = None,
+    limit: Annotated[
+        int, Query(ge=1, le=SEARCH_MAX_LIMIT)
+    ] = SEARCH_DEFAULT_LIMIT,
+):
+    return await run_db(
+        db,
+        search_people,
+        query=q,
+        limit=limit,
+        kind=kind.value if kind else None,
+    )
+
+
+# Monitoramento
+@router.get('/stats/pool/')
+async def pool_stats_route(_current_user: CurrentUser):
+    return get_pool_stats()
+
+
+@router.get('/stats/user-cache/')
+async def user_cache_stats_route(_current_user: CurrentUser):
+    return user_cache.stats()
+
+
+@router.get('/stats/password-hashing/')
+async def password_hashing_stats_route(_current_user: CurrentUser):
+    return password_hashing_stats()
+
+
+@router.get('/stats/scheduler/')
+async def scheduler_stats_route(
+    db: ReadSessionDep, _current_user: CurrentUser
+):
+    return await run_db(db, job_status)
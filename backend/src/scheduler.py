@@ -0,0 +1,282 @@
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from src.config import settings
+from src.constants import (NO_SHOW_GRACE_MINUTES, REMINDER_LEAD_HOURS,
+                           SCHEDULER_LOCK_CLASS, STATS_REFRESH_DAYS)
+from src.controllers.crud_appointment import (apply_status_transition,
+                                              eligible_appointments)
+from src.models import (AppointmentModel, AppointmentReminderModel,
+                        ScheduledJobModel)
+from src.partitions import clinic_today, maintain_partitions
+from src.stats import rebuild_stats
+
+logger = logging.getLogger(__name__)
+
+NODE = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def mark_no_shows(db: Session, batch_size: int) -> int:
+    # consultas que terminaram ha mais de NO_SHOW_GRACE_MINUTES sem sair de
+    # agendada/confirmada; SKIP LOCKED deixa de fora linhas em edicao
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        minutes=NO_SHOW_GRACE_MINUTES
+    )
+    eligible = (
+        eligible_appointments(['scheduled', 'confirmed'])
+        .where(AppointmentModel.end_hour < cutoff)
+        .order_by(AppointmentModel.end_hour)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return len(apply_status_transition(db, eligible, 'no_show'))
+
+
+def enqueue_reminders(db: Session, batch_size: int) -> int:
+    now = datetime.now(timezone.utc)
+    pending = (
+        select(
+            AppointmentModel.id,
+            AppointmentModel.date_hour - timedelta(hours=REMINDER_LEAD_HOURS),
+            func.now(),
+        )
+        .where(
+            AppointmentModel.status.in_(['scheduled', 'confirmed']),
+            AppointmentModel.date_hour > now,
+            AppointmentModel.date_hour
+            <= now + timedelta(hours=REMINDER_LEAD_HOURS),
+            ~select(AppointmentReminderModel.id)
+            .where(
+                AppointmentReminderModel.appointment_id == AppointmentModel.id
+            )
+            .exists(),
+        )
+        .order_by(AppointmentModel.date_hour)
+        .limit(batch_size)
+    )
+    result = db.execute(
+        pg_insert(AppointmentReminderModel)
+        .from_select(['appointment_id', 'remind_at', 'created_at'], pending)
+        .on_conflict_do_nothing(index_elements=['appointment_id'])
+    )
+    return result.rowcount
+
+
+def refresh_stats(db: Session, batch_size: int) -> int:
+    # corrige desvios de appointment_daily_stats (ex. SQL manual) na janela
+    # em uso; um lote so, rebuild_stats faz o proprio commit
+    # dias no fuso da clinica, como as chaves de appointment_daily_stats
+    today = clinic_today()
+    window = timedelta(days=STATS_REFRESH_DAYS)
+    return rebuild_stats(db, today - window, today + window)
+
+
+def partition_maintenance(db: Session, batch_size: int) -> int:
+    # DETACH CONCURRENTLY precisa de conexoes proprias, fora da transacao
+    # da Session; conta as particoes criadas e retiradas
+    result = maintain_partitions(db.get_bind().engine)
+    return len(result['created']) + len(result['retired'])
+
+
+class Job:
+    def __init__(self, name: str, interval: float, run, batched: bool = True):
+        self.name = name
+        self.interval = interval
+        self.run = run
+        self.batched = batched
+
+
+JOBS = {
+    job.name: job
+    for job in (
+        Job('mark_no_shows', 5 * 60, mark_no_shows),
+        Job('enqueue_reminders', 5 * 60, enqueue_reminders),
+        Job('refresh_stats', 60 * 60, refresh_stats, batched=False),
+        Job(
+            'partition_maintenance', 6 * 60 * 60, partition_maintenance,
+            batched=False,
+        ),
+    )
+}
+
+
+TRY_LOCK = text('SELECT pg_try_advisory_lock(:lock_class, hashtext(:name))')
+UNLOCK = text('SELECT pg_advisory_unlock(:lock_class, hashtext(:name))')
+
+
+def is_due(db: Session, job: Job, force: bool) -> bool:
+    last_started = db.scalar(
+        select(ScheduledJobModel.last_started_at).where(
+            ScheduledJobModel.name == job.name
+        )
+    )
+    return force or last_started is None or (
+        datetime.now(timezone.utc) - last_started
+        >= timedelta(seconds=job.interval)
+    )
+
+
+def run_job(engine, job: Job, force: bool = False) -> str:
+    # lock de sessao por job: so uma replica executa o job por vez e, se o
+    # processo cair, o lock some junto com a conexao; o horario da ultima
+    # execucao, gravado por quem tem o lock, evita repetir dentro do intervalo
+    key = {'lock_class': SCHEDULER_LOCK_CLASS, 'name': job.name}
+    with engine.connect() as connection:
+        locked = connection.scalar(TRY_LOCK, key)
+        # sem transacao aberta, os commits da Session valem na conexao
+        connection.commit()
+        if not locked:
+            return 'locked'
+        try:
+            with Session(bind=connection) as db:
+                if not is_due(db, job, force):
+                    db.rollback()
+                    return 'not_due'
+                return execute_job(db, job)
+        finally:
+            try:
+                connection.execute(UNLOCK, key)
+                connection.commit()
+            except Exception:
+                # o lock e da sessao: a conexao nao pode voltar ao pool com ele
+                connection.invalidate()
+                raise
+
+
+def execute_job(db: Session, job: Job) -> str:
+    record = db.get(ScheduledJobModel, job.name) or ScheduledJobModel(
+        name=job.name, runs=0, last_processed=0, failures=0, processed=0
+    )
+    record.last_started_at = datetime.now(timezone.utc)
+    record.node = NODE
+    db.add(record)
+    db.commit()
+
+    start = time.perf_counter()
+    processed, status, error = 0, 'success', None
+    try:
+        # lotes limitados, cada um na sua transacao
+        for _ in range(settings.SCHEDULER_MAX_BATCHES if job.batched else 1):
+            count = job.run(db, settings.SCHEDULER_BATCH_SIZE)
+            db.commit()
+            processed += count
+            if count < settings.SCHEDULER_BATCH_SIZE:
+                break
+    except Exception as e:
+        db.rollback()
+        status, error = 'error', f'{type(e).__name__}: {e}'
+        logger.exception('Scheduler job %s failed', job.name)
+    elapsed = time.perf_counter() - start
+
+    # os totais ficam na tabela: o /metrics da API os le de la, qualquer
+    # que seja o processo (worker ou API) que executou o job
+    record = db.get(ScheduledJobModel, job.name)
+    record.last_finished_at = datetime.now(timezone.utc)
+    record.last_status = status
+    record.last_error = error
+    record.last_processed = processed
+    record.last_duration_seconds = elapsed
+    record.runs += 1
+    record.processed += processed
+    if status == 'success':
+        record.last_success_at = record.last_finished_at
+    else:
+        record.failures += 1
+    db.commit()
+
+    logger.info(
+        'Scheduler job %s: %s, %d processed in %.2fs',
+        job.name, status, processed, elapsed,
+    )
+    return status
+
+
+class Scheduler(threading.Thread):
+    # roda em thread (API com SCHEDULER_ENABLED) ou no processo do worker
+    def __init__(self, engine, jobs=None, tick: float | None = None):
+        super().__init__(name='scheduler', daemon=True)
+        self.engine = engine
+        self.jobs = list(jobs or JOBS.values())
+        self.tick = tick or settings.SCHEDULER_TICK_SECONDS
+        self.stopping = threading.Event()
+
+    def run(self):
+        while not self.stopping.is_set():
+            for job in self.jobs:
+                if self.stopping.is_set():
+                    break
+                try:
+                    run_job(self.engine, job)
+                except Exception:
+                    # banco fora do ar etc.: tenta de novo no proximo tick
+                    logger.exception('Scheduler could not run %s', job.name)
+            self.stopping.wait(self.tick)
+
+    def stop(self, timeout: float | None = None):
+        self.stopping.set()
+        self.join(timeout)
+
+
+def job_status(db: Session) -> list[dict]:
+    rows = db.scalars(
+        select(ScheduledJobModel).order_by(ScheduledJobModel.name)
+    )
+    return [
+        {
+            'name': row.name,
+            'interval_seconds': getattr(JOBS.get(row.name), 'interval', None),
+            'last_started_at': row.last_started_at,
+            'last_finished_at': row.last_finished_at,
+            'last_status': row.last_status,
+            'last_error': row.last_error,
+            'last_processed': row.last_processed,
+            'last_duration_seconds': row.last_duration_seconds,
+            'last_success_at': row.last_success_at,
+            'runs': row.runs,
+            'failures': row.failures,
+            'processed': row.processed,
+            'node': row.node,
+        }
+        for row in rows
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.scheduler')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('run', help='executa os jobs continuamente')
+    once = commands.add_parser(
+        'run-once', help='executa os jobs uma vez, ignorando o intervalo'
+    )
+    once.add_argument('jobs', nargs='*', metavar='job')
+    args = parser.parse_args(argv)
+    unknown = set(getattr(args, 'jobs', ())) - set(JOBS)
+    if unknown:
+        parser.error(f'unknown job: {", ".join(sorted(unknown))}')
+    logging.basicConfig(level=logging.INFO)
+
+    from src.database import engine
+
+    if args.command == 'run':
+        scheduler = Scheduler(engine)
+        scheduler.start()
+        try:
+            while scheduler.is_alive():
+                scheduler.join(1)
+        except KeyboardInterrupt:
+            scheduler.stop()
+        return
+    for name in args.jobs or JOBS:
+        print(f'{name}: {run_job(engine, JOBS[name], force=True)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 from datetime import date, datetime
 from enum import Enum
+from typing import Generic, TypeVar
+from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field, validator
+from src.constants import MAX_BULK_IDS
+
+T = TypeVar('T')
 
 
 class InsuranceProvider(str, Enum):
@@ -63,6 +68,32 @@ class PatientResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# leitura com ?expand= e ?fields=: so os campos pedidos sao devolvidos
+class PersonRead(BaseModel):
+    id: int
+    name: str | None = None
+    birth_date: date | None = None
+    gender: Gender | None = None
+    document: str | None = None
+    phone_number: str | None = None
+    email: str | None = None
+    created_at: datetime | None = None
+    deleted_at: datetime | None = None
+
+class PatientRead(BaseModel):
+    id: int
+    person_id: int | None = None
+    medical_record_number: UUID | None = None
+    insurance_provider: InsuranceProvider | None = None
+    insurance_number: str | None = None
+    blood_type: str | None = None
+    organ_donor: bool | None = None
+    emergency_contact: str | None = None
+    emergency_phone: str | None = None
+    created_at: datetime | None = None
+    deleted_at: datetime | None = None
+    person: PersonRead | None = None
  
 class PatientUpdate(PatientBase):
     # person fields
@@ -115,6 +146,18 @@ class ProviderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProviderRead(BaseModel):
+    id: int
+    person_id: int | None = None
+    specialty: str | None = None
+    work_shift: WorkShift | None = None
+    license_number: str | None = None
+    active: bool | None = None
+    availability_notes: str | None = None
+    created_at: datetime | None = None
+    deleted_at: datetime | None = None
+    person: PersonRead | None = None
+
 class ProviderUpdate(ProviderBase):
     # person fields
     name: str | None = None
@@ -158,6 +201,19 @@ class AppointmentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AppointmentRead(BaseModel):
+    id: int
+    patient_id: int | None = None
+    provider_id: int | None = None
+    date_hour: datetime | None = None
+    end_hour: datetime | None = None
+    status: AppointmentStatus | None = None
+    reason: str | None = None
+    notes: str | None = None
+    created_at: datetime | None = None
+    patient: PatientRead | None = None
+    provider: ProviderRead | None = None
+
 class AppointmentUpdate(AppointmentBase):
     provider_id: int | None = None
     date_hour: datetime | None = None
@@ -175,6 +231,73 @@ class AppointmentUpdate(AppointmentBase):
             return v
         raise ValueError("Invalid status.")
 
+# alteracao de status em lote: ids explicitos e/ou filtros
+class AppointmentStatusTransition(BaseModel):
+    status: AppointmentStatus
+    ids: list[int] | None = Field(default=None, max_length=MAX_BULK_IDS)
+    provider_id: int | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+    from_status: list[AppointmentStatus] | None = None
+
+class AppointmentStatusTransitionResult(BaseModel):
+    status: AppointmentStatus
+    updated: int
+    ids: list[int]
+    skipped_ids: list[int] = []
+
+#importacao
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+class ImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[ImportRowError]
+
+#paginacao
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+#agenda
+class ProviderAvailability(BaseModel):
+    provider_id: int
+    specialty: ProviderSpeciality
+    slots: list[datetime]
+
+#painel
+class AppointmentDailyStats(BaseModel):
+    day: date
+    provider_id: int
+    counts: dict[AppointmentStatus, int]
+    total: int
+
+#busca
+class PersonKind(str, Enum):
+    patient = "patient"
+    provider = "provider"
+
+class PersonSearchResult(BaseModel):
+    person_id: int
+    name: str
+    document: str | None = None
+    email: str
+    phone_number: str
+    patient_id: int | None = None
+    provider_id: int | None = None
+    score: float
+
 #autenticacao
 class UserBase(BaseModel):
     email: EmailStr
@@ -192,6 +315,15 @@ class User(BaseModel):
         from_attributes = True
 
 
+class AuthenticatedUser(BaseModel):
+    id: int
+    is_active: bool
+    admin: bool | None = None
+
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
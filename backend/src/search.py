@@ -0,0 +1,161 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.constants import SEARCH_SIMILARITY_THRESHOLD
+
+WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(value: str | None) -> str:
+    return (value or '').lower()
+
+
+def word_trigrams(word: str) -> set[str]:
+    # mesmo padding do pg_trgm: dois espacos antes e um depois da palavra
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(value: str | None) -> set[str]:
+    result = set()
+    for word in WORD.findall(normalize(value)):
+        result |= word_trigrams(word)
+    return result
+
+
+def similarity(left: set[str], right: set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def word_similarity(query: set[str], words: list[set[str]]) -> float:
+    # aproximacao do word_similarity do pg_trgm: melhor trecho contiguo de
+    # palavras do texto (words = trigramas de cada palavra)
+    best = 0.0
+    for start in range(len(words)):
+        extent = set()
+        for grams in words[start:]:
+            extent |= grams
+            best = max(best, similarity(query, extent))
+    return best
+
+
+class PrefixIndex:
+    # lista ordenada de (valor, id): busca por prefixo com bisect
+    def __init__(self, items):
+        self.items = sorted(items)
+
+    def search(self, prefix: str) -> set:
+        start = bisect.bisect_left(self.items, (prefix,))
+        found = set()
+        for value, key in self.items[start:]:
+            if not value.startswith(prefix):
+                break
+            found.add(key)
+        return found
+
+
+class PeopleIndex:
+    # indice em memoria usado quando o banco nao tem pg_trgm (SQLite nos
+    # testes); reconstruido na primeira busca depois de qualquer escrita
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stale = True
+        self.tracking = False
+        self.rows = {}
+        self.words = {}
+        self.postings = {}
+        self.documents = PrefixIndex([])
+        self.phones = PrefixIndex([])
+
+    def invalidate(self):
+        self.stale = True
+
+    def track(self):
+        # os listeners entram na primeira busca pelo fallback; no Postgres
+        # nunca sao registrados e as escritas nao pagam por eles
+        with self.lock:
+            if self.tracking:
+                return
+            event.listen(Session, 'after_flush', self.invalidate_after_flush)
+            event.listen(Session, 'do_orm_execute', self.invalidate_after_dml)
+            self.tracking = True
+
+    # escritas via ORM (flush) ou via insert/update/delete no Session
+    def invalidate_after_flush(self, session, _flush_context):
+        self.invalidate()
+
+    def invalidate_after_dml(self, orm_execute_state):
+        if not orm_execute_state.is_select:
+            self.invalidate()
+
+    def build(self, rows: list[dict]):
+        postings = defaultdict(set)
+        for row in rows:
+            for gram in trigrams(row['name']) | trigrams(row['email']):
+                postings[gram].add(row['person_id'])
+        self.rows = {row['person_id']: row for row in rows}
+        self.words = {
+            row['person_id']: [
+                word_trigrams(word)
+                for word in WORD.findall(normalize(row['name']))
+            ]
+            for row in rows
+        }
+        self.postings = dict(postings)
+        self.documents = PrefixIndex(
+            (normalize(row['document']), row['person_id']) for row in rows
+        )
+        self.phones = PrefixIndex(
+            (normalize(row['phone_number']), row['person_id']) for row in rows
+        )
+        self.stale = False
+
+    def ensure(self, load):
+        with self.lock:
+            if self.stale:
+                self.build(load())
+
+    def search(self, query: str, limit: int, kind: str | None = None):
+        text = normalize(query)
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        # similaridade >= limite exige ao menos essa fracao de trigramas
+        # em comum; o resto nem e pontuado
+        minimum = math.ceil(SEARCH_SIMILARITY_THRESHOLD * len(query_grams))
+        candidates = {key for key, count in shared.items() if count >= minimum}
+        candidates |= self.documents.search(text)
+        candidates |= self.phones.search(text)
+
+        results = []
+        for person_id in candidates:
+            row = self.rows[person_id]
+            if kind and row[f'{kind}_id'] is None:
+                continue
+            score = max(
+                word_similarity(query_grams, self.words[person_id]),
+                similarity(query_grams, trigrams(row['email'])),
+                1.0 if normalize(row['document']).startswith(text) else 0.0,
+                0.9 if normalize(row['phone_number']).startswith(text) else 0.0,
+            )
+            substring = (
+                text in normalize(row['name'])
+                or text in normalize(row['email'])
+            )
+            if score >= SEARCH_SIMILARITY_THRESHOLD or substring:
+                results.append({**row, 'score': score})
+        return heapq.nsmallest(
+            limit, results, key=lambda row: (-row['score'], row['name'])
+        )
+
+
+people_index = PeopleIndex()
@@ -1,12 +1,30 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
 from src.config import settings
+from src.metrics import Histogram
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# o bcrypt libera o GIL, entao threads bastam para tira-lo do event loop
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+HASH_TIMINGS = {
+    "verify": Histogram(buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)),
+    "hash": Histogram(buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)),
+}
+hashing_state = {"pending": 0, "rejected": 0}
 
 
 def create_access_token(subject: str | Any, expires_delta: timedelta):
@@ -23,4 +41,54 @@ def verify_password(plain_password, hashed_password):
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+def _timed(operation, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        HASH_TIMINGS[operation].observe(time.perf_counter() - start)
+
+
+async def _run_hashing(operation, fn, *args):
+    limit = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT
+    if hashing_state["pending"] >= limit:
+        hashing_state["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    hashing_state["pending"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            hash_executor, _timed, operation, fn, *args
+        )
+    finally:
+        hashing_state["pending"] -= 1
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hashing(
+        "verify", verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password):
+    return await _run_hashing("hash", get_password_hash, password)
+
+
+def password_hashing_stats() -> dict:
+    return {
+        "rounds": settings.BCRYPT_ROUNDS,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "queue_limit": settings.PASSWORD_HASH_QUEUE_LIMIT,
+        "pending": hashing_state["pending"],
+        "rejected": hashing_state["rejected"],
+        "verify": HASH_TIMINGS["verify"].snapshot(),
+        "hash": HASH_TIMINGS["hash"].snapshot(),
+    }
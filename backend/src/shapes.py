@@ -0,0 +1,95 @@
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only
+
+# campos devolvidos quando o cliente nao pede ?fields=
+DEFAULT_FIELDS = ('id', 'created_at')
+DEFAULT_SHAPE = {'': DEFAULT_FIELDS}
+
+
+def split_param(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def relation_model(model, path: str):
+    for name in path.split('.') if path else []:
+        relationship = inspect(model).relationships.get(name)
+        if relationship is None:
+            raise HTTPException(
+                status_code=400, detail=f'Unknown relation: {path}'
+            )
+        model = relationship.mapper.class_
+    return model
+
+
+def column_names(model) -> list[str]:
+    return [column.key for column in inspect(model).column_attrs]
+
+
+def add_path(shape: dict, path: str):
+    parts = path.split('.')
+    for i in range(1, len(parts) + 1):
+        shape.setdefault('.'.join(parts[:i]), None)
+
+
+def parse_shape(model, expand: str | None, fields: str | None) -> dict:
+    # shape: caminho da relacao ('' = recurso principal) -> colunas
+    shape = {'': None}
+    for path in split_param(expand):
+        relation_model(model, path)
+        add_path(shape, path)
+
+    requested = {}
+    for field in split_param(fields):
+        path, _, name = field.rpartition('.')
+        target = relation_model(model, path)
+        if name not in column_names(target):
+            raise HTTPException(
+                status_code=400, detail=f'Unknown field: {field}'
+            )
+        if path:
+            add_path(shape, path)
+        requested.setdefault(path, ['id'])
+        if name not in requested[path]:
+            requested[path].append(name)
+
+    for path in shape:
+        if path in requested:
+            shape[path] = tuple(requested[path])
+        elif path == '':
+            shape[path] = DEFAULT_FIELDS
+        else:
+            shape[path] = tuple(column_names(relation_model(model, path)))
+    return shape
+
+
+def child_paths(shape: dict, path: str) -> list[str]:
+    return [
+        child for child in shape
+        if child and child.rpartition('.')[0] == path
+    ]
+
+
+def load_options(model, shape: dict, extra_columns=(), path: str = ''):
+    # uma unica query: relacoes muitos-para-um via JOIN, so com as colunas
+    # pedidas (as colunas do cursor entram para montar o proximo cursor)
+    columns = dict.fromkeys([*shape[path], *extra_columns])
+    options = [load_only(*[getattr(model, name) for name in columns])]
+    for child in child_paths(shape, path):
+        attribute = getattr(model, child.rpartition('.')[2])
+        target = attribute.property.mapper.class_
+        options.append(
+            joinedload(attribute).options(
+                *load_options(target, shape, path=child)
+            )
+        )
+    return options
+
+
+def serialize(obj, shape: dict, path: str = '') -> dict:
+    data = {name: getattr(obj, name) for name in shape[path]}
+    for child in child_paths(shape, path):
+        name = child.rpartition('.')[2]
+        related = getattr(obj, name)
+        data[name] = None if related is None else serialize(related, shape, child)
+    return data
@@ -0,0 +1,162 @@
+import argparse
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from src.config import settings
+from src.models import AppointmentDailyStatsModel, AppointmentModel
+from src.partitions import list_partitions
+
+Stats = AppointmentDailyStatsModel
+
+
+def stats_key(provider_id: int | None, date_hour: datetime, status: str):
+    if provider_id is None:
+        return None
+    day = date_hour.astimezone(ZoneInfo(settings.CLINIC_TIMEZONE)).date()
+    return (day, provider_id, status)
+
+
+def booking_deltas(appointment, previous: tuple | None = None) -> dict:
+    # previous = (provider_id, date_hour, status) antes da alteracao
+    deltas = Counter()
+    key = stats_key(
+        appointment.provider_id, appointment.date_hour, appointment.status
+    )
+    deltas[key] += 1
+    if previous is not None:
+        deltas[stats_key(*previous)] -= 1
+    return {key: delta for key, delta in deltas.items() if key and delta}
+
+
+def status_deltas(rows, status: str) -> dict:
+    # rows = (provider_id, date_hour, status anterior) das linhas alteradas
+    deltas = Counter()
+    for provider_id, date_hour, previous in rows:
+        deltas[stats_key(provider_id, date_hour, status)] += 1
+        deltas[stats_key(provider_id, date_hour, previous)] -= 1
+    return {key: delta for key, delta in deltas.items() if key and delta}
+
+
+def apply_stats_deltas(db: Session, deltas: dict):
+    # um upsert para todas as chaves; ordenadas para que transacoes
+    # concorrentes travem as linhas sempre na mesma ordem
+    if not deltas:
+        return
+    stmt = pg_insert(Stats).values(
+        [
+            {
+                'day': day,
+                'provider_id': provider_id,
+                'status': status,
+                'count': delta,
+            }
+            for (day, provider_id, status), delta in sorted(deltas.items())
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Stats.day, Stats.provider_id, Stats.status],
+            set_={'count': Stats.count + stmt.excluded['count']},
+        )
+    )
+
+
+def history_start(db: Session) -> date | None:
+    # primeiro mes ainda anexado a appointment; os anteriores ja sairam pela
+    # retencao e so existem em appointment_daily_stats
+    months = [
+        month
+        for _, month, pending in list_partitions(db.connection())
+        if pending is False
+    ]
+    return months[0] if months else None
+
+
+def rebuild_stats(
+    db: Session, start: date | None = None, end: date | None = None
+) -> int:
+    # recalcula [start, end] a partir de appointment sem travar a tabela. Em
+    # REPEATABLE READ, as linhas de stats da janela ficam em FOR UPDATE: quem
+    # agenda grava o atendimento antes de ajustar stats, entao espera a trava
+    # e soma o proprio delta por cima do recalculo. Uma escrita que commitou
+    # depois do snapshot faz o FOR UPDATE (ou o upsert) falhar com erro de
+    # serializacao, e o recalculo fica para a proxima execucao
+    db.execute(text('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ'))
+    # so ha o que recalcular enquanto appointment tem as linhas: antes do
+    # primeiro mes anexado, o recalculo zeraria os meses ja retirados
+    first = history_start(db)
+    if first is None:
+        db.rollback()
+        return 0
+    start = first if start is None else max(start, first)
+    day = func.date(
+        func.timezone(settings.CLINIC_TIMEZONE, AppointmentModel.date_hour)
+    )
+    current = select(Stats.day, Stats.provider_id, Stats.status, Stats.count)
+    rows = (
+        select(
+            day, AppointmentModel.provider_id, AppointmentModel.status,
+            func.count(),
+        )
+        .where(AppointmentModel.provider_id.is_not(None))
+        .group_by(day, AppointmentModel.provider_id, AppointmentModel.status)
+    )
+    # intervalo em date_hour, com os limites do dia no fuso da clinica: usa o
+    # indice e le so as particoes da janela
+    timezone = ZoneInfo(settings.CLINIC_TIMEZONE)
+    start_at = datetime.combine(start, time.min, timezone)
+    current = current.where(Stats.day >= start)
+    rows = rows.where(AppointmentModel.date_hour >= start_at)
+    if end is not None:
+        end_at = datetime.combine(end + timedelta(days=1), time.min, timezone)
+        current = current.where(Stats.day <= end)
+        rows = rows.where(AppointmentModel.date_hour < end_at)
+
+    # mesma ordem de apply_stats_deltas, para nao haver deadlock
+    locked = {
+        (row.day, row.provider_id, row.status): row.count
+        for row in db.execute(
+            current.order_by(Stats.day, Stats.provider_id, Stats.status)
+            .with_for_update()
+        )
+    }
+    counts = {
+        (row_day, provider_id, status): count
+        for row_day, provider_id, status, count in db.execute(rows)
+    }
+    # so as linhas com desvio sao escritas
+    deltas = {
+        key: counts.get(key, 0) - locked.get(key, 0)
+        for key in counts.keys() | locked.keys()
+    }
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    apply_stats_deltas(db, deltas)
+    db.commit()
+    return len(deltas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.stats')
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild = commands.add_parser(
+        'rebuild',
+        help='recalcula appointment_daily_stats a partir das particoes '
+        'anexadas (meses ja retirados ficam como estao)',
+    )
+    rebuild.add_argument('--start', type=date.fromisoformat)
+    rebuild.add_argument('--end', type=date.fromisoformat)
+    args = parser.parse_args(argv)
+
+    from src.database import SessionLocal
+
+    with SessionLocal() as db:
+        rows = rebuild_stats(db, start=args.start, end=args.end)
+    print(f'{rows} rows corrected')
+
+
+if __name__ == '__main__':
+    main()
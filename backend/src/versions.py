@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from src.models import ChangeVersionModel
+
+# tabelas lidas por cada recurso (inclusive via ?expand=)
+PATIENT_TABLES = ('patient', 'person')
+PROVIDER_TABLES = ('provider', 'person')
+APPOINTMENT_TABLES = ('appointment', 'patient', 'provider', 'person')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bump_versions(db: Session, *tables: str):
+    # chamado logo antes do commit: a linha fica travada so durante o commit
+    db.execute(
+        update(ChangeVersionModel)
+        .where(ChangeVersionModel.table_name.in_(tables))
+        .values(
+            version=ChangeVersionModel.version + 1,
+            updated_at=func.clock_timestamp(),
+        )
+    )
+
+
+def get_versions(db: Session, tables: tuple) -> dict:
+    rows = db.execute(
+        select(
+            ChangeVersionModel.table_name,
+            ChangeVersionModel.version,
+            ChangeVersionModel.updated_at,
+        ).where(ChangeVersionModel.table_name.in_(tables))
+    ).all()
+    versions = {name: (version, updated) for name, version, updated in rows}
+    return {name: versions.get(name, (0, EPOCH)) for name in tables}
+
+
+def validators(versions: dict, representation: str) -> tuple[str, datetime]:
+    # a mesma versao das tabelas com outra query (filtros, fields, cursor)
+    # e outra representacao, entao a URL entra no hash
+    key = representation + ''.join(
+        f'|{name}:{version}'
+        for name, (version, _) in sorted(versions.items())
+    )
+    etag = 'W/"%s"' % hashlib.sha1(key.encode()).hexdigest()[:20]
+    last_modified = max(updated_at for _, updated_at in versions.values())
+    return etag, last_modified.replace(microsecond=0)
+
+
+def not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime,
+) -> bool:
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or etag.removeprefix('W/') in tags
+    if if_modified_since is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
@@ -0,0 +1,100 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from src.controllers import create_user
+from src.controllers.crud_users import get_user
+from src.database import SessionLocal, engine
+from src.main import app
+from src.profiler import query_budget as budget
+from src.schemas import UserCreate
+
+# os testes usam o banco de DATABASE_URL, com as migracoes aplicadas; os
+# registros criados levam documentos aleatorios e nao colidem entre execucoes
+USERNAME = 'pytest'
+PASSWORD = 'pytest'
+
+
+@pytest.fixture(scope='session')
+def client():
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f'database unavailable: {e.orig}')
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope='session')
+def auth_headers(client):
+    with SessionLocal() as db:
+        if get_user(db, username=USERNAME) is None:
+            create_user(
+                db,
+                UserCreate(
+                    username=USERNAME,
+                    email=f'{USERNAME}@example.com',
+                    password=PASSWORD,
+                    admin=False,
+                ),
+            )
+    response = client.post(
+        '/login/', data={'username': USERNAME, 'password': PASSWORD}
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+@pytest.fixture
+def warm_user_cache(client, auth_headers):
+    # o login nao preenche o user_cache, so get_current_user: sem uma
+    # requisicao autenticada recente, o bloco medido ganha o SELECT do usuario
+    response = client.get('/patients/?limit=1', headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+
+@pytest.fixture
+def query_budget():
+    # with query_budget(3): client.get(...) falha se o bloco passar de 3
+    # statements (ou repetir formatos, com max_repeated)
+    return budget
+
+
+def person_payload(**extra) -> dict:
+    return {
+        'name': 'Teste Pytest',
+        'birth_date': '1990-01-01',
+        'gender': 'female',
+        'document': uuid.uuid4().hex[:11],
+        'phone_number': '11999999999',
+        'email': 'teste@example.com',
+        **extra,
+    }
+
+
+@pytest.fixture
+def patient(client, auth_headers) -> int:
+    response = client.post(
+        '/patients/',
+        headers=auth_headers,
+        json=person_payload(insurance_provider='particular'),
+    )
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+
+@pytest.fixture
+def provider(client, auth_headers) -> int:
+    response = client.post(
+        '/providers/',
+        headers=auth_headers,
+        json=person_payload(
+            specialty='cardiology',
+            work_shift='full_day',
+            license_number=f'CRM-{uuid.uuid4().hex[:8]}',
+            active=True,
+        ),
+    )
+    assert response.status_code == 200, response.text
+    return response.json()['id']
@@ -0,0 +1,17 @@
+from src import cache
+from src.cache import TTLCache
+
+
+def test_hits_do_not_extend_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    users = TTLCache(maxsize=10, ttl=60)
+    users.set(1, 'user')
+
+    now[0] += 50
+    assert users.get(1) == 'user'
+    # o acerto acima nao empurra o prazo: expira 60s depois do set
+    now[0] += 11
+    assert users.get(1) is None
+    assert users.stats()['hits'] == 1
+    assert users.stats()['misses'] == 1
@@ -0,0 +1,55 @@
+import json
+
+from sqlalchemy import select
+from src.database import SessionLocal
+from src.models import PatientModel, PersonModel
+
+from tests.conftest import person_payload
+
+
+def import_patients(client, auth_headers, *rows) -> dict:
+    body = ''.join(json.dumps(row) + '\n' for row in rows)
+    response = client.post(
+        '/patients/import/?format=ndjson',
+        headers=auth_headers,
+        files={'file': ('patients.ndjson', body, 'application/x-ndjson')},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_import_matches_create_for_existing_people(client, auth_headers):
+    # removido: o cadastro reativaria a pessoa, entao a importacao tambem
+    removed = person_payload(insurance_provider='particular')
+    response = client.post('/patients/', headers=auth_headers, json=removed)
+    removed_id = response.json()['id']
+    response = client.delete(f'/patients/{removed_id}', headers=auth_headers)
+    assert response.status_code == 204
+
+    active = person_payload(insurance_provider='particular')
+    response = client.post('/patients/', headers=auth_headers, json=active)
+    assert response.status_code == 200
+
+    new = person_payload(insurance_provider='particular')
+    result = import_patients(client, auth_headers, removed, active, new)
+
+    assert result['inserted'] == 2
+    assert result['errors'] == [
+        {'line': 2, 'detail': 'Patient already exists.'}
+    ]
+    with SessionLocal() as db:
+        people = db.execute(
+            select(PersonModel.id, PersonModel.deleted_at).where(
+                PersonModel.document == removed['document']
+            )
+        ).all()
+        patients = db.scalars(
+            select(PatientModel).where(
+                PatientModel.person_id == people[0].id,
+                PatientModel.deleted_at.is_(None),
+            )
+        ).all()
+    # a mesma pessoa, reativada, com um novo paciente
+    assert len(people) == 1 and people[0].deleted_at is None
+    assert [patient.id for patient in patients] != [removed_id]
+    assert len(patients) == 1
@@ -0,0 +1,26 @@
+from src.database import SessionLocal, engine
+from src.models import ScheduledJobModel
+from src.scheduler import JOBS, run_job
+
+
+def test_metrics_report_jobs_from_scheduled_job(client):
+    # como no servico scheduler: o job roda fora do processo que serve /metrics
+    assert run_job(engine, JOBS['enqueue_reminders'], force=True) == 'success'
+    with SessionLocal() as db:
+        record = db.get(ScheduledJobModel, 'enqueue_reminders')
+        runs, failures = record.runs, record.failures
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert (
+        'scheduler_job_runs_total'
+        f'{{job="enqueue_reminders",outcome="success"}} {runs - failures}'
+    ) in lines
+    assert any(
+        line.startswith(
+            'scheduler_job_last_success_timestamp_seconds'
+            '{job="enqueue_reminders"}'
+        )
+        for line in lines
+    )
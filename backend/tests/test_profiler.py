@@ -0,0 +1,44 @@
+import pytest
+
+# os orcamentos contam so os statements do endpoint
+pytestmark = pytest.mark.usefixtures('warm_user_cache')
+
+
+def test_patient_list_with_person_fits_budget(
+    client, auth_headers, patient, query_budget
+):
+    # change_version (ETag) + a listagem com person no mesmo SELECT
+    with query_budget(2, max_repeated=0):
+        response = client.get(
+            '/patients/?limit=20&expand=person', headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert all('person' in item for item in response.json()['items'])
+
+
+def test_patient_detail_with_person_fits_budget(
+    client, auth_headers, patient, query_budget
+):
+    with query_budget(2, max_repeated=0):
+        response = client.get(
+            f'/patients/{patient}?expand=person', headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert response.json()['person']['name'] == 'Teste Pytest'
+
+
+def test_query_budget_fails_when_exceeded(
+    client, auth_headers, patient, query_budget
+):
+    with pytest.raises(AssertionError, match='Query budget exceeded'):
+        with query_budget(1):
+            client.get('/patients/?limit=20', headers=auth_headers)
+
+
+def test_query_budget_flags_repeated_statements(
+    client, auth_headers, patient, query_budget
+):
+    with pytest.raises(AssertionError, match='possible N\\+1'):
+        with query_budget(100, max_repeated=0):
+            for _ in range(3):
+                client.get(f'/patients/{patient}', headers=auth_headers)
@@ -0,0 +1,78 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from src.controllers import search_people
+from src.models import PatientModel, PersonModel, ProviderModel
+from src.search import people_index
+
+
+def is_tracking() -> bool:
+    return event.contains(
+        Session, 'after_flush', people_index.invalidate_after_flush
+    )
+
+
+@pytest.fixture
+def sqlite_session():
+    # so as tabelas de pessoas: o resto do schema depende do Postgres
+    engine = create_engine('sqlite://')
+    PersonModel.metadata.create_all(
+        engine,
+        tables=[
+            PersonModel.__table__,
+            PatientModel.__table__,
+            ProviderModel.__table__,
+        ],
+    )
+    with Session(engine) as session:
+        yield session
+    if people_index.tracking:
+        event.remove(Session, 'after_flush', people_index.invalidate_after_flush)
+        event.remove(Session, 'do_orm_execute', people_index.invalidate_after_dml)
+        people_index.tracking = False
+    people_index.invalidate()
+    engine.dispose()
+
+
+def add_patient(session: Session, name: str, document: str):
+    person = PersonModel(
+        name=name,
+        birth_date=date(1990, 1, 1),
+        document=document,
+        phone_number='11999999999',
+        email=f'{document}@example.com',
+    )
+    session.add(person)
+    session.flush()
+    session.add(PatientModel(person_id=person.id))
+    session.commit()
+
+
+def test_postgres_writes_do_not_touch_fallback(client, auth_headers, patient):
+    response = client.put(
+        f'/patients/{patient}',
+        headers=auth_headers,
+        json={'name': 'Teste Pytest Editado'},
+    )
+    assert response.status_code == 200
+    assert not is_tracking()
+
+
+def test_fallback_search_ranks_and_sees_new_writes(sqlite_session):
+    add_patient(sqlite_session, 'Maria Silva', '12345678901')
+    add_patient(sqlite_session, 'Mario Souza', '98765432100')
+
+    results = search_people(sqlite_session, 'maria silv', 10)
+    assert results[0]['name'] == 'Maria Silva'
+    assert is_tracking()
+
+    assert [row['name'] for row in search_people(sqlite_session, '987', 10)] == [
+        'Mario Souza'
+    ]
+
+    # a escrita invalida o indice e a proxima busca ja encontra a pessoa
+    add_patient(sqlite_session, 'Marina Silveira', '55544433322')
+    names = {row['name'] for row in search_people(sqlite_session, 'silv', 10)}
+    assert 'Marina Silveira' in names
@@ -0,0 +1,51 @@
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+from src.config import settings
+from src.controllers.crud_appointment import appointment_end
+from src.database import SessionLocal, engine
+from src.models import AppointmentModel
+from src.partitions import add_months, clinic_today, list_partitions
+from src.stats import apply_stats_deltas, booking_deltas
+
+
+@pytest.fixture
+def old_appointment(client, patient, provider):
+    # consulta ativa de meses atras, que o agendamento ja nao aceitaria,
+    # na particao anexada mais antiga
+    with engine.connect() as connection:
+        months = [
+            month
+            for _, month, pending in list_partitions(connection)
+            if pending is not None and month < add_months(clinic_today(), -1)
+        ]
+    if not months:
+        pytest.skip('no appointment partition older than last month')
+    month = months[0]
+    date_hour = datetime.combine(
+        month.replace(day=10), time(9), ZoneInfo(settings.CLINIC_TIMEZONE)
+    )
+    appointment = AppointmentModel(
+        patient_id=patient,
+        provider_id=provider,
+        date_hour=date_hour,
+        end_hour=appointment_end(date_hour),
+        status='scheduled',
+    )
+    with SessionLocal() as db:
+        db.add(appointment)
+        # appointment_daily_stats acompanha, como nos controllers
+        apply_stats_deltas(db, booking_deltas(appointment))
+        db.commit()
+
+
+@pytest.mark.parametrize(
+    'resource, fixture', [('patients', 'patient'), ('providers', 'provider')]
+)
+def test_old_active_appointment_blocks_delete(
+    client, auth_headers, old_appointment, request, resource, fixture
+):
+    resource_id = request.getfixturevalue(fixture)
+    response = client.delete(f'/{resource}/{resource_id}', headers=auth_headers)
+    assert response.status_code == 409
@@ -0,0 +1,135 @@
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+from src.config import settings
+from src.controllers.crud_appointment import appointment_end
+from src.database import SessionLocal, engine
+from src.models import AppointmentDailyStatsModel as Stats
+from src.models import AppointmentModel
+from src.partitions import (apply_retention, clinic_today, list_partitions,
+                            month_bounds)
+from src.stats import (apply_stats_deltas, booking_deltas, rebuild_stats,
+                       stats_key)
+
+from tests.test_write_round_trips import appointment_payload
+
+
+@pytest.fixture
+def appointment(client, auth_headers, patient, provider):
+    payload = appointment_payload(patient, provider)
+    response = client.post('/appointments/', headers=auth_headers, json=payload)
+    assert response.status_code == 200, response.text
+    key = stats_key(
+        provider, datetime.fromisoformat(payload['date_hour']), 'scheduled'
+    )
+    return response.json()['id'], key
+
+
+def stats_count(key) -> int:
+    day, provider_id, status = key
+    with SessionLocal() as db:
+        return db.scalar(
+            select(Stats.count).where(
+                Stats.day == day,
+                Stats.provider_id == provider_id,
+                Stats.status == status,
+            )
+        )
+
+
+def test_rebuild_fixes_drift(appointment):
+    _, key = appointment
+    day, provider_id, status = key
+    with SessionLocal() as db:
+        # desvio como o de um UPDATE manual em appointment
+        db.execute(
+            update(Stats)
+            .where(
+                Stats.day == day,
+                Stats.provider_id == provider_id,
+                Stats.status == status,
+            )
+            .values(count=Stats.count + 5)
+        )
+        db.commit()
+        assert rebuild_stats(db, day, day) >= 1
+    assert stats_count(key) == 1
+
+
+def test_rebuild_does_not_wait_for_appointment_writes(appointment):
+    appointment_id, key = appointment
+    day = key[0]
+    with engine.connect() as writer, engine.connect() as connection:
+        # escrita em andamento em appointment, ainda sem commit
+        writer.execute(
+            text("UPDATE appointment SET notes = 'em edicao' WHERE id = :id"),
+            {'id': appointment_id},
+        )
+        connection.exec_driver_sql("SET lock_timeout = '1s'")
+        connection.commit()
+        try:
+            with Session(bind=connection) as db:
+                rebuild_stats(db, day, day)
+        finally:
+            connection.exec_driver_sql('RESET lock_timeout')
+            connection.commit()
+            writer.rollback()
+    assert stats_count(key) == 1
+
+
+@pytest.fixture
+def retired_month(client, patient, provider):
+    # consulta no mes anexado mais antigo, que a retencao entao destaca; a
+    # particao volta ao fim do teste
+    today = clinic_today()
+    with engine.connect() as connection:
+        months = [
+            (name, month)
+            for name, month, pending in list_partitions(connection)
+            if pending is False and month < today.replace(day=1)
+        ]
+    if not months:
+        pytest.skip('no appointment partition before the current month')
+    name, month = months[0]
+    date_hour = datetime.combine(
+        month.replace(day=10), time(9), ZoneInfo(settings.CLINIC_TIMEZONE)
+    )
+    appointment = AppointmentModel(
+        patient_id=patient,
+        provider_id=provider,
+        date_hour=date_hour,
+        end_hour=appointment_end(date_hour),
+        status='completed',
+    )
+    with SessionLocal() as db:
+        db.add(appointment)
+        apply_stats_deltas(db, booking_deltas(appointment))
+        db.commit()
+    key = stats_key(provider, date_hour, 'completed')
+    count = stats_count(key)
+
+    keep_months = (today.year - month.year) * 12 + today.month - month.month - 1
+    assert apply_retention(engine, keep_months, today=today) == [name]
+    try:
+        yield key, count
+    finally:
+        lower, upper = month_bounds(month)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    f'ALTER TABLE appointment ATTACH PARTITION {name} '
+                    f"FOR VALUES FROM ('{lower.isoformat()}') "
+                    f"TO ('{upper.isoformat()}')"
+                )
+            )
+
+
+@pytest.mark.parametrize('start', [None, date(2000, 1, 1)])
+def test_rebuild_keeps_retired_months(retired_month, start):
+    key, count = retired_month
+    with SessionLocal() as db:
+        rebuild_stats(db, start=start)
+    assert stats_count(key) == count
@@ -0,0 +1,138 @@
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+from src.config import settings
+from src.partitions import add_months, clinic_today
+
+from tests.conftest import person_payload
+
+MISSING_ID = 10**9
+
+# os orcamentos contam so os statements do endpoint
+pytestmark = pytest.mark.usefixtures('warm_user_cache')
+
+
+def appointment_payload(patient: int, provider: int) -> dict:
+    # dia 10 do mes seguinte: a particao ja existe (PARTITION_MONTHS_AHEAD)
+    day = add_months(clinic_today(), 1).replace(day=10)
+    date_hour = datetime.combine(
+        day, time(14), ZoneInfo(settings.CLINIC_TIMEZONE)
+    )
+    return {
+        'patient_id': patient,
+        'provider_id': provider,
+        'date_hour': date_hour.isoformat(),
+        'status': 'scheduled',
+    }
+
+
+def test_create_patient_round_trips(client, auth_headers, query_budget):
+    # pessoa existente + INSERT em CTE + versao
+    with query_budget(3, max_repeated=0):
+        response = client.post(
+            '/patients/',
+            headers=auth_headers,
+            json=person_payload(insurance_provider='particular'),
+        )
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize(
+    'resource, fixture, extra',
+    [
+        ('patients', 'patient', {'insurance_provider': 'unimed'}),
+        ('providers', 'provider', {'specialty': 'nutrition'}),
+    ],
+)
+def test_update_round_trips(
+    client, auth_headers, query_budget, request, resource, fixture, extra
+):
+    resource_id = request.getfixturevalue(fixture)
+    with query_budget(3, max_repeated=0):
+        response = client.put(
+            f'/{resource}/{resource_id}',
+            headers=auth_headers,
+            json={'name': 'Teste Pytest Editado', **extra},
+        )
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize(
+    'resource, fixture', [('patients', 'patient'), ('providers', 'provider')]
+)
+def test_update_of_missing_row_keeps_etag(
+    client, auth_headers, query_budget, request, resource, fixture
+):
+    request.getfixturevalue(fixture)
+    etag = client.get(f'/{resource}/?limit=1', headers=auth_headers).headers[
+        'etag'
+    ]
+    # UPDATE condicionado de person + SELECT do recurso; sem linha
+    # alterada, sem bump de versao
+    with query_budget(2):
+        response = client.put(
+            f'/{resource}/{MISSING_ID}',
+            headers=auth_headers,
+            json={'name': 'Teste Pytest Editado'},
+        )
+    assert response.status_code == 404
+    response = client.get(f'/{resource}/?limit=1', headers=auth_headers)
+    assert response.headers['etag'] == etag
+
+
+@pytest.mark.parametrize(
+    'resource, fixture', [('patients', 'patient'), ('providers', 'provider')]
+)
+def test_delete_round_trips(
+    client, auth_headers, query_budget, request, resource, fixture
+):
+    resource_id = request.getfixturevalue(fixture)
+    # UPDATE condicionado (sem atendimento ativo) + versao
+    with query_budget(2, max_repeated=0):
+        response = client.delete(
+            f'/{resource}/{resource_id}', headers=auth_headers
+        )
+    assert response.status_code == 204, response.text
+    with query_budget(2):
+        response = client.delete(
+            f'/{resource}/{resource_id}', headers=auth_headers
+        )
+    assert response.status_code == 404
+
+
+def test_create_appointment_round_trips(
+    client, auth_headers, patient, provider, query_budget
+):
+    payload = appointment_payload(patient, provider)
+    # INSERT + estatistica diaria + versao
+    with query_budget(3, max_repeated=0):
+        response = client.post(
+            '/appointments/', headers=auth_headers, json=payload
+        )
+    assert response.status_code == 200, response.text
+
+    # o conflito sai da constraint de exclusao, sem SELECT previo
+    with query_budget(1):
+        response = client.post(
+            '/appointments/', headers=auth_headers, json=payload
+        )
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize(
+    'missing, detail',
+    [('patient', 'Patient not found'), ('provider', 'Provider not found')],
+)
+def test_appointment_missing_reference_round_trips(
+    client, auth_headers, patient, provider, query_budget, missing, detail
+):
+    payload = appointment_payload(patient, provider)
+    payload[f'{missing}_id'] = MISSING_ID
+    # a FK responde pelo INSERT, sem buscar paciente e profissional antes
+    with query_budget(1):
+        response = client.post(
+            '/appointments/', headers=auth_headers, json=payload
+        )
+    assert response.status_code == 404
+    assert response.json()['detail'] == detail
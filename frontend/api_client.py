@@ -0,0 +1,138 @@
+import base64
+import json
+import threading
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (API_BACKOFF_FACTOR, API_BASE_URL, API_CONNECT_TIMEOUT,
+                    API_POOL_SIZE, API_READ_TIMEOUT, API_RETRIES,
+                    CLINIC_API_PASSWORD, CLINIC_API_USER,
+                    TOKEN_REFRESH_MARGIN)
+
+# só métodos idempotentes são repetidos após a resposta; falhas de conexão
+# (a requisição nem saiu) são repetidas para qualquer método
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = (502, 503, 504)
+
+
+def token_expiry(token):
+    # lê o "exp" do JWT sem validar a assinatura (isso é papel da API)
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class ApiClient:
+    def __init__(self, base_url=API_BASE_URL):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+        # conexões keep-alive reaproveitadas entre as requisições
+        retry = Retry(
+            total=API_RETRIES,
+            backoff_factor=API_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=API_POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = None
+        self._credentials = None
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    @property
+    def logged_in(self):
+        return self._token is not None
+
+    def login(self, username, password):
+        with self._lock:
+            return self._login(username, password)
+
+    def _login(self, username, password):
+        response = self.session.post(
+            self.url("/login/"),
+            data={"username": username, "password": password},
+            timeout=self.timeout,
+        )
+        if response.status_code == 200:
+            self._token = response.json()["access_token"]
+            self._expires_at = token_expiry(self._token)
+            # guardadas só em memória, para renovar o token ao expirar
+            self._credentials = (username, password)
+        return response
+
+    def logout(self):
+        with self._lock:
+            self._token = None
+            self._expires_at = None
+            self._credentials = None
+            self.session.cookies.clear()
+
+    def token(self, refresh=False):
+        with self._lock:
+            expiring = self._expires_at is not None and (
+                time.time() >= self._expires_at - TOKEN_REFRESH_MARGIN
+            )
+            if self._token and not (refresh or expiring):
+                return self._token
+            credentials = self._credentials
+            if credentials is None and CLINIC_API_USER:
+                credentials = (CLINIC_API_USER, CLINIC_API_PASSWORD)
+            if credentials is None:
+                return None if refresh else self._token
+            self._token = None
+            self._login(*credentials)
+            return self._token
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        response = self._send(method, path, self.token(), **kwargs)
+        if response.status_code == 401:
+            # token recusado antes do "exp" (ex.: SECRET_KEY trocada): renova
+            # uma vez e repete
+            token = self.token(refresh=True)
+            if token:
+                response = self._send(method, path, token, **kwargs)
+        return response
+
+    def _send(self, method, path, token, **kwargs):
+        headers = dict(kwargs.pop("headers", None) or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.session.request(
+            method, self.url(path), headers=headers, **kwargs
+        )
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+
+def get_client():
+    # um cliente por sessão do navegador: pool, cookies e token próprios
+    if "api_client" not in st.session_state:
+        st.session_state["api_client"] = ApiClient()
+    return st.session_state["api_client"]
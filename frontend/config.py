@@ -1 +1,25 @@
-api_token = None
\ No newline at end of file
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
+# conta usada quando não há usuário logado na sessão
+CLINIC_API_USER = os.getenv("CLINIC_API_USER")
+CLINIC_API_PASSWORD = os.getenv("CLINIC_API_PASSOWORD")
+
+# tempo máximo (s) para conectar e para ler a resposta
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+API_RETRIES = int(os.getenv("API_RETRIES", "3"))
+API_BACKOFF_FACTOR = float(os.getenv("API_BACKOFF_FACTOR", "0.5"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+
+# o token é renovado quando faltar menos que isso (s) para expirar
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+
+# grades paginadas: validade (s) das páginas em cache e tamanhos de página
+GRID_CACHE_TTL = int(os.getenv("GRID_CACHE_TTL", "60"))
+GRID_PAGE_SIZES = (25, 50, 100)
@@ -0,0 +1,109 @@
+import threading
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from api_client import get_client
+from config import GRID_CACHE_TTL, GRID_PAGE_SIZES
+
+# geração por recurso: sobe a cada escrita e faz parte da chave do cache,
+# então nenhuma sessão volta a ler páginas anteriores à escrita
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def invalidate(resource):
+    with _generations_lock:
+        _generations[resource] = _generations.get(resource, 0) + 1
+
+
+@st.cache_data(ttl=GRID_CACHE_TTL, max_entries=1000, show_spinner=False)
+def fetch_page(_client, resource, params, after, limit, generation):
+    # params é uma tupla de pares para entrar na chave do cache; _client
+    # fica fora da chave (as páginas são iguais para qualquer usuário)
+    query = dict(params, limit=limit)
+    if after:
+        query["after"] = after
+    response = _client.get(f"/{resource}/", params=query)
+    response.raise_for_status()
+    return response.json()
+
+
+def _reset(state):
+    state["cursors"] = [None]
+
+
+def _previous_page(state):
+    if len(state["cursors"]) > 1:
+        state["cursors"].pop()
+
+
+def _next_page(state, cursor):
+    state["cursors"].append(cursor)
+
+
+def paginated_grid(resource, key, params=(), columns=None):
+    # uma página por vez, navegando pelos cursores devolvidos pela API; a
+    # pilha de cursores guarda o caminho para o botão "Anterior"
+    params = tuple(
+        sorted(
+            (name, value) for name, value in params if value not in (None, "")
+        )
+    )
+    state = st.session_state.setdefault(
+        f"{key}_grid", {"params": params, "cursors": [None]}
+    )
+    if state["params"] != params:
+        # filtros mudaram: volta para a primeira página
+        state["params"] = params
+        _reset(state)
+
+    page_size = st.selectbox(
+        "Itens por página",
+        GRID_PAGE_SIZES,
+        key=f"{key}_page_size",
+        on_change=_reset,
+        args=(state,),
+    )
+    client = get_client()
+    generation = _generations.get(resource, 0)
+    try:
+        page = fetch_page(
+            client, resource, params, state["cursors"][-1], page_size, generation
+        )
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro ao carregar os dados: {e}")
+        return
+
+    frame = pd.json_normalize(page["items"])
+    if columns:
+        frame = frame.reindex(columns=list(columns)).rename(columns=columns)
+    st.dataframe(frame, hide_index=True, width="stretch")
+
+    previous, label, following = st.columns([1, 2, 1])
+    previous.button(
+        "← Anterior",
+        key=f"{key}_previous",
+        disabled=len(state["cursors"]) == 1,
+        on_click=_previous_page,
+        args=(state,),
+    )
+    label.caption(f"Página {len(state['cursors'])}")
+    following.button(
+        "Próxima →",
+        key=f"{key}_next",
+        disabled=not page["next_cursor"],
+        on_click=_next_page,
+        args=(state, page["next_cursor"]),
+    )
+
+    # pré-carrega a próxima página depois de desenhar a atual: o clique em
+    # "Próxima" já encontra o resultado no cache
+    if page["next_cursor"]:
+        try:
+            fetch_page(
+                client, resource, params, page["next_cursor"], page_size, generation
+            )
+        except requests.exceptions.RequestException:
+            pass
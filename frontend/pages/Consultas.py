@@ -0,0 +1,73 @@
+import datetime
+
+import streamlit as st
+from api_functions import do_logout
+from grids import paginated_grid
+
+st.set_page_config(page_title="Consultas", page_icon="📅")
+
+if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
+    st.warning("Você precisa fazer login para acessar esta página.")
+    st.switch_page("Login.py")
+
+st.sidebar.title("Menu")
+st.sidebar.page_link("pages/Consultas.py", label="Consultas")
+st.sidebar.page_link("pages/Pacientes.py", label="Pacientes")
+st.sidebar.page_link("pages/Profissionais.py", label="Profissionais")
+
+if st.sidebar.button("🚪 Sair"):
+    st.session_state["logged_in"] = False
+    st.session_state["api_token"] = None
+    do_logout()
+    st.switch_page("Login.py")
+
+STATUS_MAP = {
+    "Agendada": "scheduled",
+    "Confirmada": "confirmed",
+    "Em andamento": "in_progress",
+    "Concluída": "completed",
+    "Cancelada": "cancelled",
+    "Não compareceu": "no_show"
+}
+
+st.markdown("### 📅 Consultas")
+
+today = datetime.date.today()
+period_col, status_col, provider_col = st.columns([2, 1, 1])
+period = period_col.date_input(
+    "Período",
+    value=(today, today + datetime.timedelta(days=30)),
+)
+status = status_col.selectbox("Status", ["Todos"] + list(STATUS_MAP.keys()))
+provider_id = provider_col.number_input("ID do profissional", min_value=0, step=1)
+newest_first = st.checkbox("Mais recentes primeiro")
+
+# o seletor devolve só o início enquanto o fim ainda não foi escolhido
+start = period[0] if period else None
+end = period[1] if len(period) > 1 else None
+
+paginated_grid(
+    "appointments",
+    key="appointments",
+    params=[
+        ("fields", "id,date_hour,status,reason,patient.person.name,"
+                   "provider.person.name,provider.specialty"),
+        ("sort", "-date_hour" if newest_first else "date_hour"),
+        ("date_hour__gte", start.isoformat() if start else None),
+        (
+            "date_hour__lt",
+            (end + datetime.timedelta(days=1)).isoformat() if end else None,
+        ),
+        ("status", STATUS_MAP.get(status)),
+        ("provider_id", provider_id or None),
+    ],
+    columns={
+        "id": "ID",
+        "date_hour": "Data/hora",
+        "status": "Status",
+        "patient.person.name": "Paciente",
+        "provider.person.name": "Profissional",
+        "provider.specialty": "Especialidade",
+        "reason": "Motivo",
+    },
+)
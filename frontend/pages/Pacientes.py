@@ -1,7 +1,8 @@
 import streamlit as st
 import requests
 import datetime
-from api_functions import create_patient
+from api_functions import create_patient, do_logout
+from grids import invalidate, paginated_grid
 
 st.set_page_config(page_title="Pacientes", page_icon="🧍‍♀️")
 
@@ -17,6 +18,7 @@ st.sidebar.page_link("pages/Profissionais.py", label="Profissionais")
 if st.sidebar.button("🚪 Sair"):
     st.session_state["logged_in"] = False
     st.session_state["api_token"] = None
+    do_logout()
     st.switch_page("Login.py")
 
 GENDER_MAP = {
@@ -90,6 +92,7 @@ with st.expander("Cadastrar novo paciente", expanded=True):
                 try:
                     response = create_patient(payload)
                     if response.status_code in (200, 201):
+                        invalidate("patients")
                         st.success("Paciente cadastrado com sucesso!")
                     else:
                         data = response.json()
@@ -102,4 +105,27 @@ with st.expander("Cadastrar novo paciente", expanded=True):
                         else:
                             st.error(f"Erro inesperado ({response.status_code}).")
                 except requests.exceptions.RequestException as e:
-                    st.error(f"Erro de conexão com o servidor: {e}")
\ No newline at end of file
+                    st.error(f"Erro de conexão com o servidor: {e}")
+
+st.markdown("#### Pacientes cadastrados")
+insurance_filter = st.selectbox(
+    "Filtrar por convênio", ["Todos"] + list(INSURANCE_PROVIDERS.keys())
+)
+paginated_grid(
+    "patients",
+    key="patients",
+    params=[
+        ("fields", "id,insurance_provider,insurance_number,person.name,"
+                   "person.document,person.phone_number,person.email"),
+        ("insurance_provider", INSURANCE_PROVIDERS.get(insurance_filter)),
+    ],
+    columns={
+        "id": "ID",
+        "person.name": "Nome",
+        "person.document": "CPF",
+        "person.phone_number": "Telefone",
+        "person.email": "E-mail",
+        "insurance_provider": "Convênio",
+        "insurance_number": "Nº do convênio",
+    },
+)
@@ -0,0 +1,68 @@
+import streamlit as st
+from api_functions import do_logout
+from grids import paginated_grid
+
+st.set_page_config(page_title="Profissionais", page_icon="🩺")
+
+if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
+    st.warning("Você precisa fazer login para acessar esta página.")
+    st.switch_page("Login.py")
+
+st.sidebar.title("Menu")
+st.sidebar.page_link("pages/Consultas.py", label="Consultas")
+st.sidebar.page_link("pages/Pacientes.py", label="Pacientes")
+st.sidebar.page_link("pages/Profissionais.py", label="Profissionais")
+
+if st.sidebar.button("🚪 Sair"):
+    st.session_state["logged_in"] = False
+    st.session_state["api_token"] = None
+    do_logout()
+    st.switch_page("Login.py")
+
+SPECIALTIES = {
+    "Psicologia": "psychology",
+    "Fisioterapia": "physiotherapy",
+    "Nutrição": "nutrition",
+    "Cardiologia": "cardiology",
+    "Dermatologia": "dermatology"
+}
+
+WORK_SHIFTS = {
+    "Manhã": "morning",
+    "Tarde": "afternoon",
+    "Integral": "full_day"
+}
+
+ACTIVE_OPTIONS = {
+    "Ativos": "true",
+    "Inativos": "false"
+}
+
+st.markdown("### 🩺 Profissionais")
+
+specialty_col, shift_col, active_col = st.columns(3)
+specialty = specialty_col.selectbox("Especialidade", ["Todas"] + list(SPECIALTIES.keys()))
+work_shift = shift_col.selectbox("Turno", ["Todos"] + list(WORK_SHIFTS.keys()))
+active = active_col.selectbox("Situação", ["Todos"] + list(ACTIVE_OPTIONS.keys()))
+
+paginated_grid(
+    "providers",
+    key="providers",
+    params=[
+        ("fields", "id,specialty,work_shift,license_number,active,"
+                   "person.name,person.phone_number,person.email"),
+        ("specialty", SPECIALTIES.get(specialty)),
+        ("work_shift", WORK_SHIFTS.get(work_shift)),
+        ("active", ACTIVE_OPTIONS.get(active)),
+    ],
+    columns={
+        "id": "ID",
+        "person.name": "Nome",
+        "specialty": "Especialidade",
+        "work_shift": "Turno",
+        "license_number": "Registro",
+        "active": "Ativo",
+        "person.phone_number": "Telefone",
+        "person.email": "E-mail",
+    },
+)
@@ -0,0 +1,3 @@
+#!/bin/sh
+# permite que a replica (docker-compose.replica.yml) faca pg_basebackup
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"